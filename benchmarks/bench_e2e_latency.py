@@ -0,0 +1,234 @@
+# latency from a champion select event of the fake lcu to the last page of that champion landing in it, plus a replayed
+# burst of selections and hovered (pre-staged) selections
+#
+#     python benchmarks/bench_e2e_latency.py [--trials 20] [--replay events.ndjson --speed 10] [--headless] [--output results.json] [--compare baseline.json]
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import tempfile
+import time
+
+import harness
+from bench_hot_paths import ROLES, load_champions
+from fake_lcu import FakeLcu
+
+PAGES_PER_CHAMPION = 5
+CHAMPION_COUNT = 20
+BURST_SIZE = 30
+BURST_INTERVAL = 0.02
+SETTLE_TIME = 0.2
+LOCAL_CELL_ID = 2
+
+
+def champ_select_session(champion_id: int) -> dict:
+    return {
+        'localPlayerCellId': LOCAL_CELL_ID,
+        'myTeam': [{'cellId': LOCAL_CELL_ID, 'championId': 0, 'championPickIntent': champion_id}],
+        'actions': [[{'actorCellId': LOCAL_CELL_ID, 'championId': champion_id, 'completed': False, 'isInProgress': True, 'type': 'pick'}]],
+        'trades': []
+    }
+
+
+def find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def last_selected_champion(replay_path: str) -> int | None:
+    champion_id = None
+    with open(replay_path, encoding='utf-8') as file:
+        for line in file:
+            event = json.loads(json.loads(line)['frame'])[2]
+            if event['uri'] == '/lol-champ-select/v1/current-champion' and event['eventType'] != 'Delete':
+                champion_id = event['data']
+    return champion_id
+
+
+def prepare_directory(directory: str, champions: list) -> dict[int, list]:
+    resources_path = os.path.join(directory, 'resources')
+    os.makedirs(resources_path)
+    for file_name in ('central_widget.ui', 'logo.png', 'logo.ico'):
+        shutil.copy(harness.FLANARUNAS_PATH / 'resources' / file_name, resources_path)
+    with open(os.path.join(resources_path, 'ddragon_cache.json'), 'w', encoding='utf-8') as file:
+        json.dump({'version': 'bench', 'validators': {}, 'champions': [[champion.id, champion.name] for champion in champions]}, file)
+    with open(os.path.join(resources_path, 'config.json'), 'w', encoding='utf-8') as file:
+        json.dump({'auto_selection': True, 'recommended_pages': False, 'list_visible': True}, file)
+
+    from models.rune_page import RunePage
+    from storage import Storage
+
+    # the client reports every page it creates as the current page and the app files it by name again, so the page
+    # names have to match their champions
+    rune_pages = {
+        champion.id: [RunePage(False, f'{champion.name} {role}', i, 8100, 8200, [8112, 8143, 8138, 8135, 8226, 8210, 5008, 5008, 5002 + i]) for i, role in enumerate(ROLES[:PAGES_PER_CHAMPION])]
+        for champion in champions[:CHAMPION_COUNT]
+    }
+    storage = Storage(os.path.join(resources_path, 'rune_pages.db'), os.path.join(resources_path, 'config.json'), os.path.join(resources_path, 'data.json'))
+    for champion_id, champion_rune_pages in rune_pages.items():
+        storage.set_champion_rune_pages(champion_id, champion_rune_pages)
+    storage.close()
+
+    return rune_pages
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    timings = sorted(timings)
+    return {
+        'min_us': round(timings[0] * 1e6, 3),
+        'median_us': round(statistics.median(timings) * 1e6, 3),
+        'p95_us': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e6, 3),
+        'max_us': round(timings[-1] * 1e6, 3),
+        'samples': len(timings)
+    }
+
+
+async def wait_until(predicate, timeout: float = 10, interval=0.005):
+    # for the state of the app, which does not notify the fake lcu
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise asyncio.TimeoutError
+        await asyncio.sleep(interval)
+
+
+def write_burst(path: str, champion_ids: list[int]):
+    with open(path, 'w', encoding='utf-8') as file:
+        for i, champion_id in enumerate(champion_ids):
+            frame = json.dumps([8, 'OnJsonApiEvent', {'data': champion_id, 'eventType': 'Update', 'uri': '/lol-champ-select/v1/current-champion'}])
+            file.write(json.dumps({'time': i * BURST_INTERVAL, 'frame': frame}) + '\n')
+
+
+async def run_benchmark(flana_runas, fake_lcu: FakeLcu, rune_pages: dict[int, list], trials: int, replay_path: str, speed: float) -> dict[str, dict]:
+    def has_pages_of(champion_id: int):
+        expected_names = sorted(rune_page.name for rune_page in rune_pages.get(champion_id, [])[:fake_lcu.owned_page_count])
+        return lambda: sorted(page['name'] for page in fake_lcu.pages.values()) == expected_names
+
+    app_task = asyncio.create_task(flana_runas.run())
+    start = time.perf_counter()
+    await fake_lcu.wait_for(lambda: fake_lcu.subscriptions >= set(flana_runas.lcu_event_dispatcher.event_names))
+    results = {'e2e/connect': summarize([time.perf_counter() - start])}
+
+    champion_ids = list(rune_pages)
+    selection_timings = []
+    first_request_timings = []
+    for i in range(trials):
+        champion_id = champion_ids[i % len(champion_ids)]
+        request_count = len(fake_lcu.request_log)
+        start = time.perf_counter()
+        fake_lcu.current_champion = champion_id
+        await fake_lcu.send_event('/lol-champ-select/v1/current-champion', champion_id)
+        await fake_lcu.wait_for(has_pages_of(champion_id))
+        selection_timings.append(time.perf_counter() - start)
+        first_request_timings.append(fake_lcu.request_log[request_count][0] - start)
+    results['e2e/select_champion'] = summarize(selection_timings)
+    results['e2e/select_champion/first_request'] = summarize(first_request_timings)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not replay_path:
+            replay_path = os.path.join(directory, 'burst.ndjson')
+            write_burst(replay_path, [champion_ids[i % len(champion_ids)] for i in range(1, BURST_SIZE + 1)])
+        last_champion_id = last_selected_champion(replay_path)
+        request_count = len(fake_lcu.request_log)
+        scheduler_stats = flana_runas.sync_scheduler.stats
+        await fake_lcu.replay(replay_path, speed)
+        replay_end = time.perf_counter()
+        if last_champion_id is not None:
+            await fake_lcu.wait_for(has_pages_of(last_champion_id))
+            results['e2e/replay/converge_after_last_event'] = summarize([time.perf_counter() - replay_end])
+        await asyncio.sleep(flana_runas.sync_scheduler.debounce * 2)
+        results['e2e/replay/counts'] = {
+            'requests': len(fake_lcu.request_log) - request_count,
+            **{f'scheduler_{key}': value - scheduler_stats[key] for key, value in flana_runas.sync_scheduler.stats.items() if key != 'pending'}
+        }
+
+    # the pages of the previous champion have to land and their events to pass before the next champion is hovered
+    prestaged_timings = []
+    prestaged_first_request_timings = []
+    request_count = len(fake_lcu.request_log)
+    for i in range(trials):
+        champion_id = champion_ids[(trials + i) % len(champion_ids)]
+        await asyncio.sleep(SETTLE_TIME)
+        fake_lcu.session = champ_select_session(champion_id)
+        await fake_lcu.send_event('/lol-champ-select/v1/session', fake_lcu.session)
+        await wait_until(lambda: flana_runas.rune_page_sync.is_prepared)
+        trial_request_count = len(fake_lcu.request_log)
+        start = time.perf_counter()
+        fake_lcu.current_champion = champion_id
+        await fake_lcu.send_event('/lol-champ-select/v1/current-champion', champion_id)
+        await fake_lcu.wait_for(has_pages_of(champion_id))
+        prestaged_timings.append(time.perf_counter() - start)
+        prestaged_first_request_timings.append(fake_lcu.request_log[trial_request_count][0] - start)
+    await fake_lcu.send_event('/lol-champ-select/v1/session', None, 'Delete')
+    results['e2e/select_champion/prestaged'] = summarize(prestaged_timings)
+    results['e2e/select_champion/prestaged/first_request'] = summarize(prestaged_first_request_timings)
+    results['e2e/select_champion/prestaged/counts'] = {'requests': len(fake_lcu.request_log) - request_count, **flana_runas.prediction_stats}
+
+    results['e2e/config'] = {'debounce_ms': flana_runas.sync_scheduler.debounce * 1000, 'pages_per_champion': PAGES_PER_CHAMPION, 'owned_page_count': fake_lcu.owned_page_count}
+    app_task.cancel()
+    await asyncio.gather(app_task, return_exceptions=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--replay')
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+    replay_path = os.path.abspath(args.replay) if args.replay else None
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    champions = load_champions()
+    previous_directory = os.getcwd()
+    directory = tempfile.mkdtemp()
+    try:
+        rune_pages = prepare_directory(directory, champions)
+        os.chdir(directory)
+        lockfile_path = os.path.join(directory, 'lockfile')
+        os.environ['FLANARUNAS_LCU_LOCKFILE'] = lockfile_path
+
+        if args.headless:
+            from core import FlanaRunasCore
+
+            flana_runas = FlanaRunasCore()
+            loop = asyncio.new_event_loop()
+        else:
+            from flana_runas import FlanaRunas
+            from my_qt.event_loop import QtEventLoop
+
+            flana_runas = FlanaRunas()
+            loop = QtEventLoop()
+        asyncio.set_event_loop(loop)
+
+        async def main_():
+            fake_lcu = FakeLcu(find_free_port())
+            await fake_lcu.start()
+            fake_lcu.write_lockfile(lockfile_path)
+            try:
+                return await run_benchmark(flana_runas, fake_lcu, rune_pages, args.trials, replay_path, args.speed)
+            finally:
+                await fake_lcu.stop()
+
+        try:
+            results = loop.run_until_complete(main_())
+        finally:
+            flana_runas.close()
+            loop.close()
+    finally:
+        os.chdir(previous_directory)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    harness.report(results, args.output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# idle cpu usage and key event to repaint latency of the old processEvents busy-spin and the integrated qt/asyncio loop
+#
+#     python benchmarks/bench_event_loop.py [--seconds 5] [--output results.json]
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+FLANARUNAS_PATH = pathlib.Path(__file__).resolve().parents[1] / 'flanarunas'
+MODES = ('spin', 'integrated')
+
+
+def measure(mode: str, seconds: float) -> dict:
+    sys.path.insert(0, str(FLANARUNAS_PATH))
+    from PySide6 import QtCore, QtGui, QtWidgets
+
+    from my_qt.event_loop import QtEventLoop
+
+    class LatencyWidget(QtWidgets.QWidget):
+        def __init__(self):
+            super().__init__()
+            self.sent_at: float | None = None
+            self.latencies = []
+
+        def keyPressEvent(self, event: QtGui.QKeyEvent):
+            self.sent_at = float(event.text())
+            self.update()
+
+        def paintEvent(self, event: QtGui.QPaintEvent):
+            if self.sent_at is not None:
+                self.latencies.append(time.perf_counter() - self.sent_at)
+                self.sent_at = None
+
+    app = QtWidgets.QApplication([])
+    widget = LatencyWidget()
+    widget.show()
+
+    def post_key_events(stop: threading.Event):
+        while not stop.wait(0.05):
+            QtCore.QCoreApplication.postEvent(widget, QtGui.QKeyEvent(QtCore.QEvent.KeyPress, QtCore.Qt.Key_A, QtCore.Qt.NoModifier, repr(time.perf_counter())))
+
+    async def spin():
+        while True:
+            app.processEvents()
+            await asyncio.sleep(0)
+
+    async def main() -> dict:
+        if mode == 'spin':
+            asyncio.create_task(spin())
+        await asyncio.sleep(0.5)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        await asyncio.sleep(seconds)
+        idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+        stop = threading.Event()
+        thread = threading.Thread(target=post_key_events, args=(stop,))
+        thread.start()
+        await asyncio.sleep(seconds)
+        stop.set()
+        thread.join()
+
+        latencies = sorted(widget.latencies)
+        return {
+            'mode': mode,
+            'idle_cpu_percent': round(idle_cpu * 100, 2),
+            'input_to_paint_ms': {
+                'samples': len(latencies),
+                'median': round(statistics.median(latencies) * 1000, 3) if latencies else None,
+                'p95': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3) if latencies else None,
+                'max': round(latencies[-1] * 1000, 3) if latencies else None
+            }
+        }
+
+    loop = QtEventLoop() if mode == 'integrated' else asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--output')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.seconds)))
+        return
+
+    env = {'QT_QPA_PLATFORM': 'offscreen', **os.environ}
+    results = [
+        json.loads(subprocess.run([sys.executable, __file__, '--mode', mode, '--seconds', str(args.seconds)], env=env, capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+        for mode in MODES
+    ]
+    text = json.dumps(results, indent=4)
+    if args.output:
+        pathlib.Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+# microbenchmarks of the hot paths, without qt, a display or network access
+#
+#     python benchmarks/bench_hot_paths.py [--output results.json] [--compare baseline.json] [--filter storage]
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import tracemalloc
+
+import harness
+import library_io
+from champion_registry import ChampionRegistry
+from lcu_events import EventDispatcher
+from models.champion import Champion
+from models.rune_page import RunePage
+from reclassification import reclassify_rune_pages
+from search import SearchIndex
+from storage import Storage
+
+LIBRARY_SIZES = (10, 1_000, 50_000)
+SEARCH_ALIAS_COUNTS = (0, 1_000, 10_000)
+IMPORT_SIZES = (1_000, 100_000)
+SEARCH_RESULT_LIMIT = 200
+ROLES = ('mid', 'top', 'adc', 'support', 'jungla', 'full ap', 'letalidad', 'tanque', 'on hit', 'vs tanques')
+ACCENTS = {'a': 'á', 'e': 'é', 'i': 'í', 'o': 'ó', 'u': 'ú', 'n': 'ñ'}
+MULTI_WORD_NAMES = {
+    'AurelionSol': 'Aurelion Sol',
+    'DrMundo': 'Dr. Mundo',
+    'JarvanIV': 'Jarvan IV',
+    'LeeSin': 'Lee Sin',
+    'MasterYi': 'Master Yi',
+    'MissFortune': 'Miss Fortune',
+    'TahmKench': 'Tahm Kench',
+    'TwistedFate': 'Twisted Fate',
+    'XinZhao': 'Xin Zhao'
+}
+
+
+def load_champions() -> list[Champion]:
+    with open(harness.DATA_PATH / 'champions.json', encoding='utf-8') as file:
+        return [Champion(champion_id, champion_name) for champion_id, champion_name in json.load(file)]
+
+
+def make_page_names(champions: list[Champion], count: int, seed=0) -> list[str]:
+    random_ = random.Random(seed)
+    names = []
+    for _ in range(count):
+        name = MULTI_WORD_NAMES.get((champion := random_.choice(champions)).name, champion.name)
+        match random_.randrange(4):
+            case 0:
+                name = ''.join(ACCENTS.get(char, char) if random_.random() < 0.3 else char for char in name.lower())
+            case 1:
+                position = random_.randrange(len(name))
+                name = name[:position] + random_.choice('abcdefghijklmnopqrstuvwxyz') + name[position + 1:]
+            case 2:
+                position = random_.randrange(len(name) - 1)
+                name = name[:position] + name[position + 1] + name[position] + name[position + 2:]
+        words = [name, random_.choice(ROLES)]
+        random_.shuffle(words)
+        names.append(' '.join(words))
+    return names
+
+
+def make_rune_pages(champions: list[Champion], count: int, seed=0) -> dict[int, list[RunePage]]:
+    random_ = random.Random(seed)
+    rune_pages: dict[int, list[RunePage]] = {}
+    for i, name in enumerate(make_page_names(champions, count, seed)):
+        champion = champions[i % len(champions)]
+        rune_pages.setdefault(champion.id, []).append(
+            RunePage(False, f'{name} {i}', i, 8000 + random_.randrange(5) * 100, 8000 + random_.randrange(5) * 100, [random_.randrange(8000, 9000) for _ in range(9)])
+        )
+    return rune_pages
+
+
+def bench_champion_matching(champions: list[Champion]) -> dict[str, dict]:
+    page_names = make_page_names(champions, 200)
+    uncached_registry = ChampionRegistry(champions, cache_size=0)
+    cached_registry = ChampionRegistry(champions)
+    for page_name in page_names:
+        cached_registry.match(page_name)
+
+    return {
+        'champion_registry/build': harness.measure(lambda: ChampionRegistry(champions)),
+        'get_page_rune_champion/uncached_x200': harness.measure(lambda: [uncached_registry.match(page_name) for page_name in page_names]),
+        'get_page_rune_champion/cached_x200': harness.measure(lambda: [cached_registry.match(page_name) for page_name in page_names])
+    }
+
+
+def bench_events() -> dict[str, dict]:
+    dispatcher = EventDispatcher()
+    for uri in ('/lol-perks/v1/currentpage', '/lol-champ-select/v1/current-champion', '/lol-champ-select/v1/grid-champions'):
+        dispatcher.register(uri, lambda data, event_type, uri_: None)
+
+    page = {'isActive': True, 'isDeletable': True, 'isTemporary': False, 'name': 'F: ahri mid', 'order': 0, 'primaryStyleId': 8100, 'subStyleId': 8200, 'selectedPerkIds': list(range(8000, 8009))}
+    frames = [
+        json.dumps([8, 'OnJsonApiEvent_lol-perks_v1_currentpage', {'data': page, 'eventType': 'Update', 'uri': '/lol-perks/v1/currentpage'}]),
+        json.dumps([8, 'OnJsonApiEvent_lol-champ-select_v1_current-champion', {'data': 103, 'eventType': 'Update', 'uri': '/lol-champ-select/v1/current-champion'}]),
+        json.dumps([8, 'OnJsonApiEvent_lol-champ-select_v1_grid-champions', {'data': {'id': 103, 'selectionStatus': {'selectedByMe': False}}, 'eventType': 'Update', 'uri': '/lol-champ-select/v1/grid-champions/103'}]),
+        json.dumps([8, 'OnJsonApiEvent', {'data': {'body': 'gg', 'fromSummonerId': 1, 'timestamp': '2022-01-01T00:00:00.000Z'}, 'eventType': 'Create', 'uri': '/lol-chat/v1/conversations/1/messages'}]),
+        json.dumps([8, 'OnJsonApiEvent', {'data': {'state': 'Idle', 'percentPatched': 100}, 'eventType': 'Update', 'uri': '/patcher/v1/products/league_of_legends/state'}])
+    ] * 200
+
+    return {
+        'lcu_events/decode_only_x1000': harness.measure(lambda: [json.loads(frame) for frame in frames]),
+        'lcu_events/dispatch_x1000': harness.measure(lambda: [dispatcher.dispatch(frame) for frame in frames])
+    }
+
+
+def bench_library_io(champions: list[Champion]) -> dict[str, dict]:
+    results = {}
+    champion_registry = ChampionRegistry(champions)
+    for size in IMPORT_SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            # the pages have no champion, so all of them are classified by their names
+            import_path = f'{directory}/import.ndjson'
+            random_ = random.Random(0)
+            with open(import_path, 'w', encoding='utf-8') as file:
+                for i, name in enumerate(make_page_names(champions, size)):
+                    rune_page = RunePage(False, name if i % 10 else f'{name} copy', i, 8000 + random_.randrange(5) * 100, 8000 + random_.randrange(5) * 100, [random_.randrange(8000, 9000) for _ in range(9)])
+                    file.write(f'{rune_page.to_json()}\n')
+
+            storage = None
+
+            def reset_storage():
+                nonlocal storage
+                if storage:
+                    storage.close()
+                shutil.rmtree(f'{directory}/db', ignore_errors=True)
+                os.makedirs(f'{directory}/db')
+                storage = Storage(f'{directory}/db/rune_pages.db', f'{directory}/db/config.json', f'{directory}/db/data.json')
+
+            repeat = 1 if size >= 100_000 else 3
+            results[f'library_io/import/{size}'] = harness.measure(lambda: library_io.import_rune_pages(storage, champion_registry, import_path), setup=reset_storage, repeat=repeat, min_time=0)
+            results[f'library_io/import_again/{size}'] = harness.measure(lambda: library_io.import_rune_pages(storage, champion_registry, import_path), repeat=repeat, min_time=0)
+            results[f'library_io/export_ndjson/{size}'] = harness.measure(lambda: library_io.export_rune_pages(storage, f'{directory}/export.ndjson'), repeat=repeat, min_time=0)
+            results[f'library_io/export_json/{size}'] = harness.measure(lambda: library_io.export_rune_pages(storage, f'{directory}/export.json'), repeat=repeat, min_time=0)
+
+            # an export has the champion of every page, so nothing is classified
+            results[f'library_io/import_exported/{size}'] = harness.measure(lambda: library_io.import_rune_pages(storage, champion_registry, f'{directory}/export.json'), setup=reset_storage, repeat=repeat, min_time=0)
+
+            # the peak memory of the import is bounded by the batch and the names of the touched champions, not the file
+            reset_storage()
+            tracemalloc.start()
+            library_io.import_rune_pages(storage, champion_registry, f'{directory}/export.json')
+            results[f'library_io/import_peak_memory/{size}'] = {'peak_bytes': tracemalloc.get_traced_memory()[1]}
+            tracemalloc.stop()
+            storage.close()
+        finally:
+            shutil.rmtree(directory)
+
+    return results
+
+
+def bench_rune_page() -> dict[str, dict]:
+    rune_page = RunePage(True, 'ahri mid', 0, 8100, 8200, [8112, 8143, 8138, 8135, 8226, 8210, 5008, 5008, 5002])
+    rune_page_json = rune_page.to_json()
+    rune_pages = [RunePage(False, f'ahri {i}', i, 8100, 8200, [8112, 8143, 8138, 8135, 8226, 8210, 5008, 5008, 5002]) for i in range(1_000)]
+    rune_pages_json = RunePage.encode_many(rune_pages)
+
+    def rename_and_encode():
+        rune_page.name = 'ahri mid'
+        return rune_page.to_json()
+
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    memory_rune_pages = [RunePage(False, f'ahri {i}', i, 8100, 8200, [8112, 8143, 8138, 8135, 8226, 8210, 5008, 5008, 5002]) for i in range(10_000)]
+    memory_per_page = (tracemalloc.get_traced_memory()[0] - start_memory) / len(memory_rune_pages)
+    tracemalloc.stop()
+
+    return {
+        'rune_page/to_json': harness.measure(rune_page.to_json),
+        'rune_page/to_json_after_rename': harness.measure(rename_and_encode),
+        'rune_page/from_json': harness.measure(lambda: RunePage.from_json(rune_page_json)),
+        'rune_page/round_trip': harness.measure(lambda: RunePage.from_json(rune_page.to_json())),
+        'rune_page/deep_copy': harness.measure(rune_page.deep_copy),
+        'rune_page/encode_many_1000': harness.measure(lambda: RunePage.encode_many(rune_pages)),
+        'rune_page/decode_many_1000': harness.measure(lambda: RunePage.decode_many(rune_pages_json)),
+        'rune_page/memory': {'bytes_per_page': round(memory_per_page, 1)}
+    }
+
+
+def bench_search(champions: list[Champion]) -> dict[str, dict]:
+    typed_texts = ['a', 'ah', 'ahr', 'ahri', 'z', 'xyz', 'ahrí', 'ahyi']
+    results = {}
+    for alias_count in SEARCH_ALIAS_COUNTS:
+        items = {champion.name for champion in champions} | set(make_page_names(champions, alias_count))
+        search_index = SearchIndex(items)
+        results[f'combo_search/search_x{len(typed_texts)}/{len(items)}'] = harness.measure(lambda: [search_index.search(text, SEARCH_RESULT_LIMIT) for text in typed_texts])
+        results[f'combo_search/add_remove/{len(items)}'] = harness.measure(lambda: (search_index.add('Zzz alias'), search_index.remove('Zzz alias')))
+        # a search after every change, as when a page is captured while the popup is open
+        results[f'combo_search/add_search_remove/{len(items)}'] = harness.measure(lambda: (search_index.add('Zzz alias'), search_index.search('ahr', SEARCH_RESULT_LIMIT), search_index.remove('Zzz alias')))
+
+    return results
+
+
+def bench_storage(champions: list[Champion]) -> dict[str, dict]:
+    results = {}
+    champion_registry = ChampionRegistry(champions)
+    new_champion_registry = ChampionRegistry([*champions, Champion(max(champion.id for champion in champions) + 1, 'Zyxthra')])
+    for size in LIBRARY_SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            storage = Storage(f'{directory}/rune_pages.db', f'{directory}/config.json', f'{directory}/data.json')
+            rune_pages = make_rune_pages(champions, size)
+
+            def save_all():
+                for champion_id, champion_rune_pages in rune_pages.items():
+                    storage.set_champion_rune_pages(champion_id, champion_rune_pages)
+
+            # every champion snapshot is different from the saved one, the pages in the reverse order
+            snapshots = [rune_pages, {champion_id: champion_rune_pages[::-1] for champion_id, champion_rune_pages in rune_pages.items()}]
+
+            def save_all_changed():
+                snapshots.append(snapshots.pop(0))
+                for champion_id, champion_rune_pages in snapshots[0].items():
+                    storage.set_champion_rune_pages(champion_id, champion_rune_pages)
+
+            save_all()
+            champion_id, champion_rune_pages = next(iter(rune_pages.items()))
+            repeat = 3 if size >= 50_000 else 5
+            results[f'load_data/{size}'] = harness.measure(storage.load_rune_pages, repeat=repeat)
+            results[f'load_index/{size}'] = harness.measure(storage.load_champion_index, repeat=repeat)
+            results[f'load_champion/{size}'] = harness.measure(lambda: storage.load_champion_rune_pages(champion_id), repeat=repeat)
+            results[f'save_data/all_champions/{size}'] = harness.measure(save_all, repeat=repeat)
+            results[f'save_data/all_champions_changed/{size}'] = harness.measure(save_all_changed, repeat=repeat)
+            results[f'save_data/one_page/{size}'] = harness.measure(lambda: storage.save_rune_page(champion_id, champion_rune_pages[0]), repeat=repeat)
+            changed_rune_pages = [champion_rune_pages[0].deep_copy(), champion_rune_pages[0].deep_copy()]
+            changed_rune_pages[1].primaryStyleId += 1
+
+            def save_one_page_changed():
+                changed_rune_pages.reverse()
+                storage.save_rune_page(champion_id, changed_rune_pages[0])
+
+            results[f'save_data/one_page_changed/{size}'] = harness.measure(save_one_page_changed, repeat=repeat)
+            # a new champion list with one more champion, every page name already has its cached match after the first pass
+            storage.save_page_matches(reclassify_rune_pages(storage, champion_registry, new_champion_registry).page_matches)
+            results[f'reclassify/{size}'] = harness.measure(lambda: reclassify_rune_pages(storage, champion_registry, new_champion_registry), repeat=repeat)
+            storage.close()
+        finally:
+            shutil.rmtree(directory)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--filter', default='')
+    args = parser.parse_args()
+
+    champions = load_champions()
+    benchmarks = {
+        'champion_matching': lambda: bench_champion_matching(champions),
+        'events': bench_events,
+        'library_io': lambda: bench_library_io(champions),
+        'rune_page': bench_rune_page,
+        'search': lambda: bench_search(champions),
+        'storage': lambda: bench_storage(champions)
+    }
+    results = {}
+    for name, benchmark in benchmarks.items():
+        if args.filter in name:
+            results |= benchmark()
+
+    harness.report(results, args.output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
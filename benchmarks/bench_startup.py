@@ -0,0 +1,156 @@
+# import time breakdown, time to first paint and to ready, and resident memory of a cold start, each trial a new process
+#
+#     python benchmarks/bench_startup.py [--trials 5] [--library-size 1000] [--output results.json] [--compare baseline.json]
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import harness
+
+MODES = ('window', 'headless')
+ENTRY_MODULES = ('core', 'flana_runas')
+TOP_PACKAGES = 10
+
+
+def measure(mode: str, started_at: float) -> dict:
+    # nothing of the app is imported before this point, so the imports are part of the measured times
+    timings = {}
+    if mode == 'window':
+        from PySide6 import QtCore
+
+        from my_qt.app import MyQtApp
+
+        class PaintFilter(QtCore.QObject):
+            def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+                if event.type() == QtCore.QEvent.Paint:
+                    timings.setdefault('first_paint', time.time() - started_at)
+                return False
+
+        # the same steps as main.pyw
+        qt_app = MyQtApp()
+        paint_filter = PaintFilter()
+        qt_app.window.installEventFilter(paint_filter)
+        qt_app.processEvents()
+
+        from flana_runas import FlanaRunas
+        from my_qt.event_loop import QtEventLoop
+
+        flana_runas = FlanaRunas(qt_app)
+        loop = QtEventLoop()
+    else:
+        from core import FlanaRunasCore
+
+        flana_runas = FlanaRunasCore()
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    async def main():
+        app_task = asyncio.create_task(flana_runas.run())
+        while not flana_runas.champions:
+            await asyncio.sleep(0.001)
+        timings['ready'] = time.time() - started_at
+        app_task.cancel()
+
+    try:
+        loop.run_until_complete(main())
+    finally:
+        flana_runas.close()
+
+    import psutil
+
+    timings['rss_bytes'] = psutil.Process().memory_info().rss
+    return timings
+
+
+def parse_importtime(stderr: str, module: str) -> dict:
+    total_us = 0
+    package_us: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        package_us[name.strip().split('.')[0]] += int(self_us)
+        if name.strip() == module:
+            total_us = int(cumulative_us)
+
+    return {
+        'min_us': total_us,
+        'top_packages_us': dict(sorted(package_us.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES])
+    }
+
+
+def prepare_directory(directory: str, library_size: int):
+    from bench_hot_paths import load_champions, make_rune_pages
+    from storage import Storage
+
+    champions = load_champions()
+    resources_path = os.path.join(directory, 'resources')
+    os.makedirs(resources_path)
+    for file_name in ('central_widget.ui', 'logo.png', 'logo.ico'):
+        shutil.copy(harness.FLANARUNAS_PATH / 'resources' / file_name, resources_path)
+    with open(os.path.join(resources_path, 'ddragon_cache.json'), 'w', encoding='utf-8') as file:
+        json.dump({'version': 'bench', 'validators': {}, 'champions': [[champion.id, champion.name] for champion in champions]}, file)
+    with open(os.path.join(resources_path, 'config.json'), 'w', encoding='utf-8') as file:
+        json.dump({'auto_selection': True, 'recommended_pages': False, 'list_visible': True}, file)
+
+    storage = Storage(os.path.join(resources_path, 'rune_pages.db'), os.path.join(resources_path, 'config.json'), os.path.join(resources_path, 'data.json'))
+    for champion_id, champion_rune_pages in make_rune_pages(champions, library_size).items():
+        storage.set_champion_rune_pages(champion_id, champion_rune_pages)
+    storage.close()
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    return {'min_us': round(values[0] * 1e6, 3), 'median_us': round(values[len(values) // 2] * 1e6, 3), 'max_us': round(values[-1] * 1e6, 3), 'samples': len(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--library-size', type=int, default=1_000)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--started-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.started_at)))
+        return
+
+    env = {**os.environ, 'QT_QPA_PLATFORM': 'offscreen', 'PYTHONPATH': os.pathsep.join(filter(None, (str(harness.FLANARUNAS_PATH), os.environ.get('PYTHONPATH'))))}
+    results = {}
+    directory = tempfile.mkdtemp()
+    try:
+        prepare_directory(directory, args.library_size)
+        for module in ENTRY_MODULES:
+            stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=directory, env=env, capture_output=True, text=True, check=True).stderr
+            results[f'startup/importtime/{module}'] = parse_importtime(stderr, module)
+
+        for mode in MODES:
+            trials = []
+            for _ in range(args.trials):
+                started_at = time.time()
+                stdout = subprocess.run([sys.executable, __file__, '--mode', mode, '--started-at', repr(started_at)], cwd=directory, env=env, capture_output=True, text=True, check=True).stdout
+                trials.append(json.loads(stdout.splitlines()[-1]))
+            if mode == 'window':
+                results[f'startup/{mode}/first_paint'] = summarize([trial['first_paint'] for trial in trials])
+            results[f'startup/{mode}/ready'] = summarize([trial['ready'] for trial in trials])
+            results[f'startup/{mode}/rss'] = {'median_bytes': sorted(trial['rss_bytes'] for trial in trials)[len(trials) // 2]}
+        results['startup/config'] = {'library_size': args.library_size, 'trials': args.trials}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    harness.report(results, args.output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
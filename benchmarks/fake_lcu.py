@@ -0,0 +1,235 @@
+# local stand-in of the lcu api and event websocket, with a lockfile for LcuDiscovery and event record/replay
+#
+#     python benchmarks/fake_lcu.py serve [--port 2999] [--lockfile lockfile] [--replay events.ndjson --speed 10]
+#     python benchmarks/fake_lcu.py record --output events.ndjson
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import pathlib
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+
+# run as a script too, so it finds the app modules itself
+if (flanarunas_path := str(pathlib.Path(__file__).resolve().parents[1] / 'flanarunas')) not in sys.path:
+    sys.path.insert(0, flanarunas_path)
+
+import process_utils
+from lcu_client import LcuClient
+from lcu_events import EVENT_OPCODE, SUBSCRIBE_OPCODE
+
+DEFAULT_PORT = 2999
+DEFAULT_AUTH_KEY = 'fake-lcu-token'
+OWNED_PAGE_COUNT = 20
+
+
+def create_ssl_context(cert_path: str = None, key_path: str = None) -> ssl.SSLContext:
+    if not cert_path:
+        directory = tempfile.mkdtemp()
+        cert_path = os.path.join(directory, 'cert.pem')
+        key_path = os.path.join(directory, 'key.pem')
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', key_path, '-out', cert_path, '-days', '1', '-subj', '/CN=127.0.0.1'],
+            capture_output=True,
+            check=True
+        )
+
+    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ssl_context.load_cert_chain(cert_path, key_path)
+    return ssl_context
+
+
+class FakeLcu:
+    def __init__(self, port=DEFAULT_PORT, auth_key=DEFAULT_AUTH_KEY, owned_page_count=OWNED_PAGE_COUNT, ssl_context: ssl.SSLContext = None):
+        self.port = port
+        self.auth_key = auth_key
+        self.owned_page_count = owned_page_count
+        self.ssl_context = ssl_context or create_ssl_context()
+        self.pages: dict[int, dict] = {}
+        self.current_champion = 0
+        self.session: dict[str, Any] = {}
+        self.request_log: list[tuple[float, str, str]] = []
+        self.changed = asyncio.Condition()
+        self._page_ids = itertools.count(1000)
+        self._sockets: dict[web.WebSocketResponse, set[str]] = {}
+        self._runner: web.AppRunner | None = None
+        self.app = web.Application(middlewares=[self._auth_middleware])
+        self.app.router.add_get('/', self._handle_websocket)
+        self.app.router.add_get('/lol-perks/v1/pages', self._get_pages)
+        self.app.router.add_post('/lol-perks/v1/pages', self._post_page)
+        self.app.router.add_delete('/lol-perks/v1/pages', self._delete_pages)
+        self.app.router.add_put('/lol-perks/v1/pages/{id}', self._put_page)
+        self.app.router.add_delete('/lol-perks/v1/pages/{id}', self._delete_page)
+        self.app.router.add_get('/lol-perks/v1/inventory', self._get_inventory)
+        self.app.router.add_get('/lol-perks/v1/currentpage', self._get_current_page)
+        self.app.router.add_get('/lol-champ-select/v1/current-champion', self._get_current_champion)
+        self.app.router.add_get('/lol-champ-select/v1/session', self._get_session)
+
+    async def _notify_changed(self, method: str, path: str):
+        self.request_log.append((time.perf_counter(), method, path))
+        async with self.changed:
+            self.changed.notify_all()
+
+    @web.middleware
+    async def _auth_middleware(self, request: web.Request, handler):
+        if request.headers.get('Authorization') != 'Basic ' + base64.b64encode(f'riot:{self.auth_key}'.encode()).decode():
+            return web.Response(status=401)
+        return await handler(request)
+
+    async def _delete_page(self, request: web.Request) -> web.Response:
+        self.pages.pop(int(request.match_info['id']), None)
+        await self._notify_changed(request.method, request.path)
+        return web.Response(status=204)
+
+    async def _delete_pages(self, request: web.Request) -> web.Response:
+        self.pages.clear()
+        await self._notify_changed(request.method, request.path)
+        return web.Response(status=204)
+
+    async def _get_current_champion(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.current_champion)
+
+    async def _get_current_page(self, _request: web.Request) -> web.Response:
+        if not self.pages:
+            return web.Response(status=404)
+        return web.json_response(next(reversed(self.pages.values())))
+
+    async def _get_inventory(self, _request: web.Request) -> web.Response:
+        return web.json_response({'ownedPageCount': self.owned_page_count})
+
+    async def _get_pages(self, _request: web.Request) -> web.Response:
+        return web.json_response(list(self.pages.values()))
+
+    async def _get_session(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.session)
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT and (message := json.loads(msg.data))[0] == SUBSCRIBE_OPCODE:
+                    self._sockets[ws].add(message[1])
+                    async with self.changed:
+                        self.changed.notify_all()
+        finally:
+            del self._sockets[ws]
+        return ws
+
+    async def _post_page(self, request: web.Request) -> web.Response:
+        if len(self.pages) >= self.owned_page_count:
+            return web.json_response({'message': 'Max pages reached'}, status=400)
+
+        page = await self._store_page(next(self._page_ids), await request.json())
+        await self._notify_changed(request.method, request.path)
+        return web.json_response(page)
+
+    async def _put_page(self, request: web.Request) -> web.Response:
+        page = await self._store_page(int(request.match_info['id']), await request.json())
+        await self._notify_changed(request.method, request.path)
+        return web.json_response(page)
+
+    async def _store_page(self, page_id: int, page: dict) -> dict:
+        page = {**page, 'id': page_id, 'isDeletable': True, 'isEditable': True, 'isTemporary': False}
+        self.pages[page_id] = page
+        await self.send_event('/lol-perks/v1/currentpage', page)
+        return page
+
+    async def replay(self, path: str, speed=1.0):
+        start = time.monotonic()
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                if (delay := record['time'] / speed - (time.monotonic() - start)) > 0:
+                    await asyncio.sleep(delay)
+                _, _, event = json.loads(record['frame'])
+                await self.send_event(event['uri'], event['data'], event['eventType'])
+
+    async def send_event(self, uri: str, data: Any, event_type='Update'):
+        full_event_name = f"OnJsonApiEvent{uri.replace('/', '_')}"
+        for ws, event_names in list(self._sockets.items()):
+            for event_name in event_names:
+                if full_event_name.startswith(event_name):
+                    await ws.send_str(json.dumps([EVENT_OPCODE, event_name, {'data': data, 'eventType': event_type, 'uri': uri}]))
+                    break
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port, ssl_context=self.ssl_context).start()
+
+    async def stop(self):
+        for ws in list(self._sockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    @property
+    def subscriptions(self) -> set[str]:
+        return set().union(*self._sockets.values())
+
+    async def wait_for(self, predicate, timeout: float = 10):
+        async with self.changed:
+            await asyncio.wait_for(self.changed.wait_for(predicate), timeout)
+
+    def write_lockfile(self, path: str):
+        pathlib.Path(path).write_text(f'LeagueClient:{os.getpid()}:{self.port}:{self.auth_key}:https')
+
+
+async def record(output: str):
+    credentials = await process_utils.LcuDiscovery.from_environment().discover()
+    async with LcuClient(credentials) as lcu_client:
+        async with lcu_client.ws_connect() as ws:
+            await ws.send_json([SUBSCRIBE_OPCODE, 'OnJsonApiEvent'])
+            start = time.monotonic()
+            with open(output, 'a', encoding='utf-8') as file:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT and msg.data:
+                        file.write(json.dumps({'time': time.monotonic() - start, 'frame': msg.data}) + '\n')
+                        file.flush()
+
+
+async def serve(port: int, lockfile: str = None, replay: str = None, speed=1.0):
+    fake_lcu = FakeLcu(port)
+    await fake_lcu.start()
+    if lockfile:
+        fake_lcu.write_lockfile(lockfile)
+    print(f'Fake LCU on https://127.0.0.1:{port} (token {fake_lcu.auth_key})')
+    try:
+        if replay:
+            await fake_lcu.replay(replay, speed)
+        await asyncio.Event().wait()
+    finally:
+        await fake_lcu.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--lockfile')
+    serve_parser.add_argument('--replay')
+    serve_parser.add_argument('--speed', type=float, default=1.0)
+    record_parser = subparsers.add_parser('record')
+    record_parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve(args.port, args.lockfile, args.replay, args.speed))
+    else:
+        asyncio.run(record(args.output))
+
+
+if __name__ == '__main__':
+    main()
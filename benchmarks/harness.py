@@ -0,0 +1,83 @@
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+ROOT_PATH = pathlib.Path(__file__).resolve().parents[1]
+FLANARUNAS_PATH = ROOT_PATH / 'flanarunas'
+DATA_PATH = pathlib.Path(__file__).resolve().parent / 'data'
+
+if str(FLANARUNAS_PATH) not in sys.path:
+    sys.path.insert(0, str(FLANARUNAS_PATH))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_PATH, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(function: Callable[[], Any], setup: Callable[[], Any] = None, repeat=5, min_time=0.2) -> dict[str, float]:
+    # the time of one call, best of repeat rounds that each last at least min_time
+    if setup:
+        setup()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        'min_us': round(min(timings) * 1e6, 3),
+        'median_us': round(statistics.median(timings) * 1e6, 3),
+        'loops': number,
+        'repeat': repeat
+    }
+
+
+def report(results: dict[str, dict], output: str = None, compare: str = None) -> dict:
+    report_ = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'results': results
+    }
+    text = json.dumps(report_, indent=4)
+    if output:
+        pathlib.Path(output).write_text(text)
+    else:
+        print(text)
+
+    if compare:
+        baseline = json.loads(pathlib.Path(compare).read_text())['results']
+        print(f"{'benchmark':<50} {'baseline_us':>14} {'current_us':>14} {'ratio':>8}", file=sys.stderr)
+        for name, result in results.items():
+            if name not in baseline or 'min_us' not in result:
+                continue
+            ratio = result['min_us'] / baseline[name]['min_us'] if baseline[name]['min_us'] else float('inf')
+            print(f"{name:<50} {baseline[name]['min_us']:>14.3f} {result['min_us']:>14.3f} {ratio:>8.2f}", file=sys.stderr)
+
+    return report_
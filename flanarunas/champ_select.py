@@ -0,0 +1,44 @@
+from collections.abc import Iterator
+from typing import Any
+
+import constants
+
+# the trades that can still end with the champion of the other player
+OPEN_TRADE_STATES = frozenset(('AVAILABLE', 'RECEIVED', 'SENT'))
+
+
+def _iter_likely_champion_ids(session: dict[str, Any]) -> Iterator[int]:
+    local_cell_id = session.get('localPlayerCellId')
+    cells = {member.get('cellId'): member for member in session.get('myTeam') or ()}
+    if local_member := cells.get(local_cell_id):
+        yield local_member.get('championId')
+
+    # the champion being hovered in the pick turn of the player
+    for action_group in session.get('actions') or ():
+        for action in action_group:
+            if action.get('actorCellId') == local_cell_id and action.get('type') == 'pick' and not action.get('completed'):
+                yield action.get('championId')
+
+    if local_member:
+        yield local_member.get('championPickIntent')
+
+    for trade in session.get('trades') or ():
+        if trade.get('state') in OPEN_TRADE_STATES and (member := cells.get(trade.get('cellId'))):
+            yield member.get('championId')
+
+    for bench_champion in session.get('benchChampions') or ():
+        yield bench_champion.get('championId')
+
+
+def predict_champion_ids(session: dict[str, Any] | None, limit=constants.PRESTAGE_CHAMPION_LIMIT) -> list[int]:
+    # the champions the player is most likely to end up with, the most likely first
+    if not session:
+        return []
+
+    champion_ids = []
+    for champion_id in _iter_likely_champion_ids(session):
+        if champion_id and champion_id not in champion_ids:
+            champion_ids.append(champion_id)
+            if len(champion_ids) == limit:
+                break
+    return champion_ids
@@ -0,0 +1,110 @@
+import functools
+from collections.abc import Iterable
+
+import jellyfish
+
+import constants
+from models.champion import Champion
+from models.page_match import PageMatch
+from models.score_match import ScoreMatch
+from search import CharIndex, normalize_name
+
+
+class ChampionRegistry:
+    def __init__(self, champions: Iterable[Champion] = (), cache_size=constants.MATCH_CACHE_SIZE):
+        self.champions = list(champions)
+        self._by_id: dict[int, Champion] = {}
+        self._by_name: dict[str, Champion] = {}
+        for champion in self.champions:
+            self._by_id.setdefault(champion.id, champion)
+            self._by_name.setdefault(champion.name, champion)
+
+        self._normalized_names = [normalize_name(champion.name) for champion in self.champions]
+        self._by_normalized_name: dict[str, Champion] = {}
+        for champion, normalized_name in zip(self.champions, self._normalized_names):
+            self._by_normalized_name.setdefault(normalized_name, champion)
+        self._char_index = CharIndex(self._normalized_names)
+
+        self._match_word = functools.lru_cache(maxsize=cache_size)(self._match_word)
+        self.match = functools.lru_cache(maxsize=cache_size)(self.match)
+
+    def __bool__(self):
+        return bool(self.champions)
+
+    def __iter__(self):
+        return iter(self.champions)
+
+    def __len__(self):
+        return len(self.champions)
+
+    def _match_word(self, word: str) -> ScoreMatch:
+        # an exact name is the best possible score, most words of the page names are one
+        if champion := self._by_normalized_name.get(word):
+            return ScoreMatch(champion, 1)
+
+        best_match = ScoreMatch(None, 0)
+        for i in self._char_index.candidates(word):
+            match_score = jellyfish.jaro_winkler_similarity(word, self._normalized_names[i])
+            if match_score >= constants.MIN_SCORE and match_score > best_match.score:
+                best_match = ScoreMatch(self.champions[i], match_score)
+
+        return best_match
+
+    def _score_word(self, word: str) -> ScoreMatch:
+        # the same result as _match_word, but every name is scored in one pass of the c similarity, which for the few
+        # champion names is cheaper than bounding them with the character index when many new words are matched at once.
+        # max + index keep the first-best tie breaking
+        if champion := self._by_normalized_name.get(word):
+            return ScoreMatch(champion, 1)
+        if not self._normalized_names:
+            return ScoreMatch(None, 0)
+
+        scores = [jellyfish.jaro_winkler_similarity(word, name) for name in self._normalized_names]
+        if (best_score := max(scores)) < constants.MIN_SCORE:
+            return ScoreMatch(None, 0)
+        return ScoreMatch(self.champions[scores.index(best_score)], best_score)
+
+    def get_by_id(self, id: int) -> Champion | None:
+        return self._by_id.get(id)
+
+    def get_by_name(self, name: str) -> Champion | None:
+        return self._by_name.get(name)
+
+    def match(self, text: str) -> Champion | None:
+        for word in text.split():
+            if (best_match := self._match_word(normalize_name(word))).element is not None:
+                return best_match.element
+
+    def match_details(self, text: str, scored_words: dict[str, ScoreMatch] = None) -> PageMatch:
+        # which word of the text matched and how well, so a later champion list only has to beat that score
+        if scored_words is None:
+            scored_words = {}
+        for i, word in enumerate(text.split()):
+            try:
+                best_match = scored_words[word]
+            except KeyError:
+                best_match = scored_words[word] = self._score_word(normalize_name(word))
+            if best_match.element is not None:
+                return PageMatch(best_match.element.id, i, best_match.score)
+
+        return PageMatch(None, -1, 0)
+
+    def match_many(self, texts: Iterable[str], scored_words: dict[str, ScoreMatch] = None) -> list[Champion | None]:
+        # the names of a batch share most of their words, so every distinct word is scored once for the whole batch, or
+        # for several batches if they share scored_words
+        if scored_words is None:
+            scored_words = {}
+        champions = []
+        for text in texts:
+            for word in text.split():
+                try:
+                    best_match = scored_words[word]
+                except KeyError:
+                    best_match = scored_words[word] = self._score_word(normalize_name(word))
+                if best_match.element is not None:
+                    break
+            else:
+                best_match = ScoreMatch(None, 0)
+            champions.append(best_match.element)
+
+        return champions
@@ -1,3 +1,45 @@
 VERSIONS_ENDPOINT = 'https://ddragon.leagueoflegends.com/api/versions.json'
 CHAMPIONS_BASE_ENDPOINT = 'https://ddragon.leagueoflegends.com/cdn/{}/data/en_US/champion.json'
 MIN_SCORE = 0.8
+MATCH_CACHE_SIZE = 1024
+SEARCH_RESULT_LIMIT = 200
+DDRAGON_CACHE_PATH = 'resources/ddragon_cache.json'
+DDRAGON_TIMEOUT = 10
+DDRAGON_RETRY_DELAY = 5
+DATABASE_PATH = 'resources/rune_pages.db'
+CONFIG_PATH = 'resources/config.json'
+LEGACY_DATA_PATH = 'resources/data.json'
+DATABASE_MMAP_SIZE = 64 * 1024 * 1024
+RUNE_PAGE_CACHE_SIZE = 32
+UNASSIGNED_CHAMPION_ID = 0
+IMPORT_BATCH_SIZE = 5000
+READ_CHUNK_SIZE = 64 * 1024
+WRITER_QUEUE_SIZE = 256
+WRITER_COALESCE_DELAY = 0.25
+LCU_PROCESS_NAMES = ('LeagueClientUx.exe', 'LeagueClientUx')
+LCU_LOCKFILE_PATHS = ('C:/Riot Games/League of Legends/lockfile', '/Applications/League of Legends.app/Contents/LoL/lockfile')
+LCU_PORT_ENV = 'FLANARUNAS_LCU_PORT'
+LCU_AUTH_KEY_ENV = 'FLANARUNAS_LCU_AUTH_KEY'
+LCU_LOCKFILE_ENV = 'FLANARUNAS_LCU_LOCKFILE'
+DISCOVERY_MIN_DELAY = 0.5
+DISCOVERY_MAX_DELAY = 5
+DISCOVERY_BACKOFF_FACTOR = 1.5
+LCU_CONNECTION_LIMIT = 8
+LCU_KEEPALIVE_TIMEOUT = 60
+LCU_REQUEST_TIMEOUT = 5
+LCU_REQUEST_RETRIES = 2
+LCU_RETRY_DELAY = 0.1
+SYNC_DEBOUNCE = 0.15
+PRESTAGE_CHAMPION_LIMIT = 3
+PREPARED_STATE_MAX_AGE = 30
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+CONNECTION_HISTORY_SIZE = 100
+METRICS_FILE_ENV = 'FLANARUNAS_METRICS_FILE'
+METRICS_PORT_ENV = 'FLANARUNAS_METRICS_PORT'
+METRICS_SNAPSHOT_INTERVAL = 10
+WATCHDOG_INTERVAL = 0.1
+STALL_THRESHOLD = 0.1
+STALL_HISTORY_SIZE = 20
+PROFILES_PATH = 'resources/profiles'
+PROFILE_SECONDS_ENV = 'FLANARUNAS_PROFILE_SECONDS'
@@ -0,0 +1,403 @@
+import asyncio
+import os
+import signal
+import sqlite3
+import time
+import traceback
+from typing import Any
+
+import aiohttp
+
+import constants
+import process_utils
+from champ_select import predict_champion_ids
+from champion_registry import ChampionRegistry
+from ddragon_cache import DataDragonCache
+from exceptions import DataDragonError, NoChampion
+from lcu_client import SESSION_ENDPOINT
+from lcu_connection import ConnectionState, LcuConnection
+from lcu_events import EventDispatcher
+from loop_diagnostics import LoopWatchdog, Profiler
+from metrics import MetricsExporter
+from models.champion import Champion
+from models.rune_page import RunePage
+from reclassification import reclassify_rune_pages
+from rune_page_library import RunePageLibrary
+from rune_sync import RunePageSync
+from scheduler import LatestWinsScheduler
+from storage import Storage
+from storage_writer import StorageWriter
+
+
+class FlanaRunasCore:
+    def __init__(self):
+        self.metrics_exporter = MetricsExporter.from_environment()
+        self.metrics = self.metrics_exporter.metrics
+        self.loop_watchdog = LoopWatchdog(self.metrics)
+        self.loop_watchdog_task: asyncio.Task | None = None
+        self.profiler = Profiler()
+        self.storage = Storage()
+        self.storage_writer = StorageWriter(self.storage, metrics=self.metrics)
+        self.rune_page_sync: RunePageSync | None = None
+        self.sync_scheduler = LatestWinsScheduler()
+        self.ddragon_cache = DataDragonCache()
+        self.champions = ChampionRegistry()
+        self.champions_revalidation_task: asyncio.Task | None = None
+        self.current_champion: Champion | None = None
+        self.champion_selected_at: float | None = None
+        self.predicted_champion_ids: list[int] | None = None
+        self.prestaging_task: asyncio.Task | None = None
+        self.warming_task: asyncio.Task | None = None
+        self.prediction_hit_count = 0
+        self.prediction_miss_count = 0
+        self.config: dict[str, Any] = self.storage.load_config()
+        self.saved_rune_pages = RunePageLibrary(self.storage, self.storage_writer, metrics=self.metrics)
+        self.lcu_event_dispatcher = EventDispatcher(self.metrics)
+        self.lcu_connection = LcuConnection(process_utils.LcuDiscovery.from_environment(), self.lcu_event_dispatcher, self.on_lcu_connected, self.metrics)
+        self.lcu_connection.state_listeners.append(self.on_lcu_state_changed)
+
+        self.lcu_event_dispatcher.register('/lol-perks/v1/currentpage', self.on_current_page_event)
+        self.lcu_event_dispatcher.register('/lol-champ-select/v1/current-champion', self.on_current_champion_event)
+        self.lcu_event_dispatcher.register('/lol-champ-select/v1/grid-champions', self.on_grid_champion_event)
+        self.lcu_event_dispatcher.register(SESSION_ENDPOINT, self.on_champ_select_session_event)
+        self.lcu_event_dispatcher.register('/lol-perks/v1/pages', self.on_pages_event)
+
+        self.metrics.set_gauge('library_size', lambda: self.saved_rune_pages.page_count)
+        self.metrics.set_gauge('pending_sync_tasks', lambda: len(self.sync_scheduler.tasks))
+        self.metrics.set_gauge('pending_storage_writes', self.storage_writer.queue.qsize)
+        self.metrics.add_collector('lcu_event_dispatcher', lambda: self.lcu_event_dispatcher.stats)
+        self.metrics.add_collector('sync_scheduler', lambda: self.sync_scheduler.stats)
+        self.metrics.add_collector('storage_writer', lambda: self.storage_writer.stats)
+        self.metrics.add_collector('rune_page_library', lambda: self.saved_rune_pages.stats)
+        self.metrics.add_collector('lcu_connection', lambda: self.lcu_connection.stats)
+        self.metrics.add_collector('loop_watchdog', lambda: self.loop_watchdog.stats)
+        self.metrics.add_collector('champion_predictions', lambda: self.prediction_stats)
+
+    def add_rune_page(self, rune_page: RunePage):
+        try:
+            champion = self.get_page_rune_champion(rune_page)
+        except NoChampion:
+            # kept apart instead of dropped, the next champion list can still classify it
+            champion = None
+            champion_id = constants.UNASSIGNED_CHAMPION_ID
+        else:
+            champion_id = champion.id
+            if champion_id not in self.saved_rune_pages:
+                self.on_champion_added(champion)
+        champion_rune_pages = self.saved_rune_pages.get(champion_id)
+
+        for i, saved_rune_page in enumerate(champion_rune_pages):
+            if saved_rune_page.name == rune_page.name:
+                if saved_rune_page == rune_page:
+                    # the client sends the current page again on every change of it, an unchanged one is not written
+                    self.metrics.increment('rune_pages_unchanged')
+                    return
+                self.replace_rune_page(champion, champion_rune_pages, i, rune_page)
+                break
+        else:
+            self.append_rune_page(champion, champion_rune_pages, rune_page)
+
+        self.saved_rune_pages.save_rune_page(champion_id, champion_rune_pages, rune_page)
+        self.metrics.increment('rune_pages_saved')
+
+    def append_rune_page(self, champion: Champion | None, champion_rune_pages: list[RunePage], rune_page: RunePage):
+        champion_rune_pages.append(rune_page)
+
+    def cancel_prestaging(self):
+        if self.prestaging_task:
+            self.prestaging_task.cancel()
+            self.prestaging_task = None
+
+    async def capture_profile(self, seconds: float):
+        if not self.profiler.is_running:
+            self.toggle_profiling()
+        await asyncio.sleep(seconds)
+        if self.profiler.is_running:
+            self.toggle_profiling()
+
+    def close(self):
+        self.cancel_prestaging()
+        if self.warming_task:
+            self.warming_task.cancel()
+        self.metrics_exporter.close()
+        self.storage_writer.close()
+        self.storage.close()
+
+    def get_champion_by_id(self, id: int) -> Champion | None:
+        return self.champions.get_by_id(id)
+
+    def get_champion_by_name(self, name: str) -> Champion | None:
+        return self.champions.get_by_name(name)
+
+    def get_page_rune_champion(self, rune_page: RunePage) -> Champion:
+        with self.metrics.time('champion_match_seconds'):
+            champion = self.champions.match(rune_page.name)
+        if champion is None:
+            raise NoChampion
+        return champion
+
+    @property
+    def is_auto_selection_enabled(self) -> bool:
+        return self.config.get('auto_selection', False)
+
+    @property
+    def is_lol_connected(self) -> bool:
+        return self.lcu_connection.is_connected
+
+    @property
+    def is_prestaged(self) -> bool:
+        return bool(
+            self.current_champion
+            and
+            self.current_champion.id in (self.predicted_champion_ids or ())
+            and
+            self.rune_page_sync
+            and
+            self.rune_page_sync.is_prepared
+        )
+
+    @property
+    def is_recommended_pages_enabled(self) -> bool:
+        return self.config.get('recommended_pages', False)
+
+    def on_champion_added(self, champion: Champion):
+        pass
+
+    def on_champions_loaded(self):
+        pass
+
+    def on_champ_select_session_event(self, data: dict | None, event_type: str, uri: str):
+        if uri != SESSION_ENDPOINT:
+            return
+        if event_type == 'Delete':
+            self.predicted_champion_ids = None
+            return
+
+        self.prestage(predict_champion_ids(data))
+
+    def on_current_champion_event(self, data: int | None, event_type: str, _uri: str):
+        if (
+                self.is_auto_selection_enabled
+                and
+                event_type != 'Delete'
+                and
+                (not self.current_champion or data != self.current_champion.id)
+        ):
+            self.select_champion(data)
+
+    def on_current_page_event(self, data: dict | None, event_type: str, uri: str):
+        self.on_pages_event(data, event_type, uri)
+        if not data or not data['isDeletable']:
+            return
+        if data['isTemporary'] and not self.is_recommended_pages_enabled:
+            return
+
+        self.add_rune_page(RunePage.from_dict(data))
+
+    def on_lcu_connected(self):
+        self.rune_page_sync = RunePageSync(self.lcu_connection.client)
+        if self.current_champion:
+            self.sync_scheduler.schedule(self.sync_rune_pages)
+
+    def on_lcu_state_changed(self, state: ConnectionState):
+        # a client state fetched from a client that is going away is of no use, and its session is being closed
+        if state is not ConnectionState.CONNECTED:
+            self.cancel_prestaging()
+
+    def on_pages_event(self, _data: Any, _event_type: str, _uri: str):
+        if self.rune_page_sync:
+            self.rune_page_sync.invalidate()
+
+    def on_grid_champion_event(self, data: dict | None, _event_type: str, _uri: str):
+        if (
+                data
+                and
+                self.is_auto_selection_enabled
+                and
+                data['selectionStatus']['selectedByMe']
+                and
+                (not self.current_champion or data['id'] != self.current_champion.id)
+        ):
+            self.select_champion(data['id'])
+
+    async def prepare_rune_page_sync(self):
+        try:
+            if await self.rune_page_sync.prepare():
+                self.metrics.increment('prepared_client_states')
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass  # the sync fetches the client state itself
+
+    @property
+    def prediction_stats(self) -> dict[str, Any]:
+        prediction_count = self.prediction_hit_count + self.prediction_miss_count
+        return {
+            'hits': self.prediction_hit_count,
+            'misses': self.prediction_miss_count,
+            'hit_rate': self.prediction_hit_count / prediction_count if prediction_count else None
+        }
+
+    def prestage(self, champion_ids: list[int]):
+        # the pages of the champions the player is hovering or can trade for are loaded and serialized, and the client
+        # state is fetched, before the lock-in, so its sync only sends the writes
+        if not self.is_auto_selection_enabled:
+            return
+
+        new_champion_ids = [champion_id for champion_id in champion_ids if champion_id in self.saved_rune_pages and champion_id not in (self.predicted_champion_ids or ())]
+        self.predicted_champion_ids = champion_ids
+        if new_champion_ids:
+            if self.warming_task:
+                self.warming_task.cancel()
+            self.warming_task = asyncio.create_task(self.warm_rune_pages(new_champion_ids))
+
+        if (
+                champion_ids
+                and
+                self.is_lol_connected
+                and
+                self.rune_page_sync
+                and
+                not self.rune_page_sync.is_prepared
+                and
+                (not self.prestaging_task or self.prestaging_task.done())
+        ):
+            self.prestaging_task = asyncio.create_task(self.prepare_rune_page_sync())
+
+    async def reclassify_rune_pages(self, old_champions: ChampionRegistry, new_champions: ChampionRegistry):
+        # a big library takes a while to load and rematch, so it is done in a thread that only reads the stored pages,
+        # the moves are applied on the loop to the pages of the library, which may have changed in the meantime
+        await asyncio.to_thread(self.storage_writer.flush)
+        try:
+            with self.metrics.time('reclassification_seconds'):
+                result = await asyncio.to_thread(reclassify_rune_pages, self.storage, old_champions, new_champions)
+            await self.saved_rune_pages.prefetch({champion_id for move in result.moves for champion_id in (move[0], move[2])})
+        except sqlite3.Error:
+            # the pages stay where they are
+            traceback.print_exc()
+            return
+
+        champion_ids = self.saved_rune_pages.move_rune_pages(result.moves, result.page_matches)
+        self.metrics.increment('rune_pages_rematched', value=result.rematched)
+        self.metrics.increment('rune_pages_reclassified', value=len(result.moves))
+        if self.current_champion and self.current_champion.id in champion_ids:
+            self.set_rune_pages()
+
+    def replace_rune_page(self, champion: Champion | None, champion_rune_pages: list[RunePage], i: int, rune_page: RunePage):
+        champion_rune_pages[i] = rune_page
+
+    async def revalidate_champions(self):
+        while True:
+            try:
+                is_changed = await self.ddragon_cache.revalidate()
+            except (aiohttp.ClientError, asyncio.TimeoutError, DataDragonError):
+                if self.champions:
+                    return
+                await asyncio.sleep(constants.DDRAGON_RETRY_DELAY)
+                continue
+            except OSError:
+                # the cache couldn't be written, the champion list that was downloaded is used anyway
+                traceback.print_exc()
+                is_changed = self.ddragon_cache.champions != list(self.champions)
+
+            if is_changed:
+                champions = ChampionRegistry(self.ddragon_cache.champions)
+                await self.reclassify_rune_pages(self.champions, champions)
+                self.champions = champions
+                self.on_champions_loaded()
+            return
+
+    async def run(self):
+        self.champions = ChampionRegistry(self.ddragon_cache.load())
+        self.champions_revalidation_task = asyncio.create_task(self.revalidate_champions())
+        if not self.champions:
+            await self.champions_revalidation_task
+        self.on_champions_loaded()
+        background_tasks = [asyncio.create_task(self.metrics_exporter.run())]
+        # the watchdog wakes the loop and its thread every interval, so it only runs while someone is looking
+        if self.metrics.is_enabled:
+            self.start_loop_watchdog()
+        if profile_seconds := os.environ.get(constants.PROFILE_SECONDS_ENV):
+            background_tasks.append(asyncio.create_task(self.capture_profile(float(profile_seconds))))
+        try:
+            # a profile of the running app can be started and stopped with SIGUSR1 too
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.toggle_profiling)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass
+        try:
+            await self.lcu_connection.run()
+        finally:
+            for background_task in background_tasks:
+                background_task.cancel()
+            # a profile still running is written with its stalls, whichever way it was started
+            if self.profiler.is_running:
+                self.toggle_profiling()
+            self.stop_loop_watchdog()
+
+    def save_config(self):
+        self.storage_writer.save_config(self.config)
+
+    def select_champion(self, champion_id: int):
+        self.champion_selected_at = time.perf_counter()
+        if self.predicted_champion_ids is not None:
+            if champion_id in self.predicted_champion_ids:
+                self.prediction_hit_count += 1
+                self.metrics.increment('champion_predictions', 'hit')
+            else:
+                self.prediction_miss_count += 1
+                self.metrics.increment('champion_predictions', 'miss')
+        self.current_champion = self.get_champion_by_id(champion_id)
+        self.set_rune_pages()
+
+    def set_rune_pages(self):
+        # a predicted champion has its sync ready, it is not delayed to wait for more selection changes
+        if self.is_prestaged:
+            # not a measured time, the debounce it doesn't wait is the configured one
+            self.metrics.observe('prestage_saved_seconds', self.sync_scheduler.debounce, 'configured_debounce')
+            self.sync_scheduler.schedule(self.sync_rune_pages, 0)
+        else:
+            self.sync_scheduler.schedule(self.sync_rune_pages)
+
+    def start_loop_watchdog(self):
+        if not self.loop_watchdog_task or self.loop_watchdog_task.done():
+            self.loop_watchdog_task = asyncio.create_task(self.loop_watchdog.run())
+
+    def stop_loop_watchdog(self):
+        if self.loop_watchdog_task:
+            self.loop_watchdog_task.cancel()
+            self.loop_watchdog_task = None
+
+    async def sync_rune_pages(self):
+        if not self.is_lol_connected:
+            return
+
+        local_champion = self.current_champion
+        selected_rune_pages = self.saved_rune_pages.get(local_champion.id) if local_champion else []
+        try:
+            result = await self.rune_page_sync.sync(selected_rune_pages, lambda: local_champion == self.current_champion)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.metrics.increment('rune_syncs', 'failed')
+            return  # the connection dropped, the pages are synced again when it is back
+
+        self.metrics.increment('rune_syncs', 'cancelled' if result.is_cancelled else 'applied')
+        if not result.is_cancelled and result.saved_seconds:
+            self.metrics.observe('prestage_saved_seconds', result.saved_seconds, 'client_state')
+        if not result.is_cancelled and self.champion_selected_at is not None:
+            self.metrics.observe('champion_select_to_pages_applied_seconds', time.perf_counter() - self.champion_selected_at)
+            self.champion_selected_at = None
+
+    def toggle_profiling(self):
+        if not self.profiler.is_running:
+            self.start_loop_watchdog()
+            self.profiler.start()
+            return
+
+        profile_path = self.profiler.stop()
+        self.loop_watchdog.dump(profile_path.removesuffix('.prof') + '.stalls.json')
+        if not self.metrics.is_enabled:
+            self.stop_loop_watchdog()
+
+    async def warm_rune_pages(self, champion_ids: list[int]):
+        with self.metrics.time('prestage_seconds'):
+            await self.saved_rune_pages.prefetch(champion_ids)
+            for champion_id in champion_ids:
+                for rune_page in self.saved_rune_pages.get(champion_id):
+                    rune_page.to_json()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+
+import constants
+from exceptions import DataDragonError
+from file_utils import write_atomically
+from models.champion import Champion
+
+
+@dataclass
+class FetchResponse:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    data: Any = None
+
+
+Fetcher = Callable[[str, dict[str, str]], Awaitable[FetchResponse]]
+
+
+async def aiohttp_fetcher(url: str, headers: dict[str, str]) -> FetchResponse:
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=constants.DDRAGON_TIMEOUT)) as session:
+        async with session.get(url, headers=headers) as response:
+            try:
+                data = await response.json(content_type=None) if response.status == 200 else None
+            except ValueError as e:
+                raise DataDragonError(f'{url} returned malformed json') from e
+            return FetchResponse(response.status, dict(response.headers), data)
+
+
+class DataDragonCache:
+    def __init__(
+        self,
+        path=constants.DDRAGON_CACHE_PATH,
+        fetcher: Fetcher = aiohttp_fetcher,
+        versions_endpoint=constants.VERSIONS_ENDPOINT,
+        champions_base_endpoint=constants.CHAMPIONS_BASE_ENDPOINT
+    ):
+        self.path = path
+        self.fetcher = fetcher
+        self.versions_endpoint = versions_endpoint
+        self.champions_base_endpoint = champions_base_endpoint
+        self.version: str | None = None
+        self.champions: list[Champion] = []
+        self._validators: dict[str, str] = {}
+
+    def _save(self):
+        write_atomically(self.path, json.dumps({
+            'version': self.version,
+            'validators': self._validators,
+            'champions': [[champion.id, champion.name] for champion in self.champions]
+        }))
+
+    def load(self) -> list[Champion]:
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                raw_dict = json.load(file)
+            self.version = raw_dict['version']
+            self._validators = raw_dict['validators']
+            self.champions = [Champion(champion_id, champion_name) for champion_id, champion_name in raw_dict['champions']]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self.version = None
+            self._validators = {}
+            self.champions = []
+
+        return self.champions
+
+    async def revalidate(self) -> bool:
+        headers = {}
+        if self.champions:
+            if etag := self._validators.get('ETag'):
+                headers['If-None-Match'] = etag
+            if last_modified := self._validators.get('Last-Modified'):
+                headers['If-Modified-Since'] = last_modified
+
+        response = await self.fetcher(self.versions_endpoint, headers)
+        if response.status == 304:
+            return False
+        if response.status != 200:
+            raise DataDragonError(f'{self.versions_endpoint} returned {response.status}')
+
+        response_headers = {k.lower(): v for k, v in response.headers.items()}
+        validators = {k: v for k in ('ETag', 'Last-Modified') if (v := response_headers.get(k.lower()))}
+        try:
+            version = response.data[0]
+        except (IndexError, KeyError, TypeError) as e:
+            raise DataDragonError(f'{self.versions_endpoint} returned no versions') from e
+        if version == self.version and self.champions:
+            self._validators = validators
+            await asyncio.to_thread(self._save)
+            return False
+
+        champions_url = self.champions_base_endpoint.format(version)
+        champions_response = await self.fetcher(champions_url, {})
+        if champions_response.status != 200:
+            raise DataDragonError(f'{champions_url} returned {champions_response.status}')
+
+        try:
+            champions = [Champion(int(champion_data['key']), champion_data['id']) for champion_data in champions_response.data['data'].values()]
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise DataDragonError(f'{champions_url} returned a malformed champion list') from e
+
+        self.champions = champions
+        self.version = version
+        self._validators = validators
+        await asyncio.to_thread(self._save)
+        return True
@@ -1,2 +1,10 @@
 class NoChampion(Exception):
     pass
+
+
+class DataDragonError(Exception):
+    pass
+
+
+class LcuDiscoveryError(Exception):
+    pass
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any
+
+import aiohttp
+
+import constants
+from metrics import Metrics, NULL_METRICS
+from models.rune_page import RunePage
+from process_utils import LcuCredentials
+
+PAGES_ENDPOINT = '/lol-perks/v1/pages'
+INVENTORY_ENDPOINT = '/lol-perks/v1/inventory'
+CURRENT_PAGE_ENDPOINT = '/lol-perks/v1/currentpage'
+CURRENT_CHAMPION_ENDPOINT = '/lol-champ-select/v1/current-champion'
+SESSION_ENDPOINT = '/lol-champ-select/v1/session'
+IDEMPOTENT_METHODS = frozenset(('GET', 'PUT', 'DELETE'))
+
+
+class LcuClient:
+    def __init__(
+        self,
+        credentials: LcuCredentials,
+        metrics: Metrics = NULL_METRICS,
+        timeout=constants.LCU_REQUEST_TIMEOUT,
+        retries=constants.LCU_REQUEST_RETRIES,
+        retry_delay=constants.LCU_RETRY_DELAY
+    ):
+        self.credentials = credentials
+        self.metrics = metrics
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.base_url = f'127.0.0.1:{credentials.port}'
+        self.session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> 'LcuClient':
+        # one keep-alive pool for the rest requests and the websocket, the host is an ip so nothing is resolved
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=constants.LCU_CONNECTION_LIMIT,
+                keepalive_timeout=constants.LCU_KEEPALIVE_TIMEOUT,
+                # the certificate of the client is signed by riot's own root certificate, which isn't shipped, so it isn't verified
+                ssl=False
+            ),
+            auth=aiohttp.BasicAuth('riot', self.credentials.auth_key),
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'}
+        )
+        return self
+
+    async def __aexit__(self, *_args):
+        await self.session.close()
+        self.session = None
+
+    async def _request(self, method: str, endpoint: str, data: str = None) -> Any:
+        # only the requests that are harmless to repeat are retried, after a dropped connection, a timeout or a 5xx
+        can_retry = method in IDEMPOTENT_METHODS
+        for attempt in range(self.retries + 1):
+            # a request that races a disconnection finds the session closed, which aiohttp reports as a RuntimeError
+            if self.session is None or self.session.closed:
+                raise aiohttp.ClientConnectionError('The LCU session is closed')
+            is_last_attempt = not can_retry or attempt == self.retries
+            try:
+                with self.metrics.time('lcu_request_seconds', method):
+                    async with self.session.request(method, f'https://{self.base_url}{endpoint}', data=data, timeout=self.timeout) as response:
+                        if response.status >= 400:
+                            self.metrics.increment('lcu_http_errors', str(response.status))
+                        if response.status < 500 or is_last_attempt:
+                            response.raise_for_status()
+                            # the writes answer with the written page or nothing, which isn't used
+                            if method != 'GET':
+                                return
+                            return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if is_last_attempt:
+                    raise
+
+            self.metrics.increment('lcu_request_retries', method)
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+    async def create_page(self, rune_page: RunePage):
+        await self._request('POST', PAGES_ENDPOINT, rune_page.to_json())
+
+    async def delete_page(self, page_id: int):
+        await self._request('DELETE', f'{PAGES_ENDPOINT}/{page_id}')
+
+    async def delete_pages(self):
+        await self._request('DELETE', PAGES_ENDPOINT)
+
+    async def get_champ_select_session(self) -> dict[str, Any] | None:
+        try:
+            return await self._request('GET', SESSION_ENDPOINT)
+        except aiohttp.ClientResponseError:
+            return None
+
+    async def get_current_champion(self) -> int | None:
+        try:
+            return await self._request('GET', CURRENT_CHAMPION_ENDPOINT) or None
+        except aiohttp.ClientResponseError:
+            return None
+
+    async def get_current_page(self) -> dict[str, Any]:
+        return await self._request('GET', CURRENT_PAGE_ENDPOINT)
+
+    async def get_inventory(self) -> dict[str, Any]:
+        return await self._request('GET', INVENTORY_ENDPOINT)
+
+    async def get_pages(self) -> list[dict[str, Any]]:
+        return await self._request('GET', PAGES_ENDPOINT)
+
+    async def update_page(self, page_id: int, rune_page: RunePage):
+        await self._request('PUT', f'{PAGES_ENDPOINT}/{page_id}', rune_page.to_json())
+
+    def ws_connect(self):
+        return self.session.ws_connect(f'wss://{self.base_url}')
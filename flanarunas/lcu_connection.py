@@ -0,0 +1,119 @@
+import asyncio
+import enum
+import random
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+import aiohttp
+
+import constants
+from lcu_client import LcuClient
+from lcu_events import EventDispatcher
+from metrics import Metrics, NULL_METRICS
+from process_utils import LcuCredentials, LcuDiscovery
+
+
+class ConnectionState(enum.Enum):
+    DISCONNECTED = enum.auto()
+    DISCOVERING = enum.auto()
+    CONNECTING = enum.auto()
+    CONNECTED = enum.auto()
+
+
+class LcuConnection:
+    def __init__(
+        self,
+        discovery: LcuDiscovery,
+        event_dispatcher: EventDispatcher,
+        on_connected: Callable[[], Any] = None,
+        metrics: Metrics = NULL_METRICS,
+        min_delay=constants.RECONNECT_MIN_DELAY,
+        max_delay=constants.RECONNECT_MAX_DELAY
+    ):
+        self.discovery = discovery
+        self.event_dispatcher = event_dispatcher
+        self.on_connected = on_connected
+        self.metrics = metrics
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.state = ConnectionState.DISCONNECTED
+        self.credentials: LcuCredentials | None = None
+        self.client: LcuClient | None = None
+        self.state_listeners: list[Callable[[ConnectionState], Any]] = []
+        self.transitions: deque[tuple[float, str]] = deque(maxlen=constants.CONNECTION_HISTORY_SIZE)
+        self.reconnect_durations: deque[float] = deque(maxlen=constants.CONNECTION_HISTORY_SIZE)
+        self.connection_count = 0
+        self._disconnected_at: float | None = None
+
+    async def _close_on_exit(self, ws: aiohttp.ClientWebSocketResponse):
+        await self.discovery.wait_for_exit(self.credentials)
+        await ws.close()
+
+    def _set_state(self, state: ConnectionState):
+        if state is self.state:
+            return
+
+        self.state = state
+        self.transitions.append((time.time(), state.name))
+        if state is ConnectionState.CONNECTED:
+            self.connection_count += 1
+            if self._disconnected_at is not None:
+                self.reconnect_durations.append(time.monotonic() - self._disconnected_at)
+                self._disconnected_at = None
+        elif state is ConnectionState.DISCONNECTED and self.connection_count:
+            self._disconnected_at = time.monotonic()
+
+        for state_listener in self.state_listeners:
+            state_listener(state)
+
+    def get_retry_delay(self, attempt: int) -> float:
+        return min(self.max_delay, self.min_delay * 2 ** attempt) * random.uniform(0.5, 1)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.state is ConnectionState.CONNECTED
+
+    async def run(self):
+        attempt = 0
+        while True:
+            self._set_state(ConnectionState.DISCOVERING)
+            self.credentials = await self.discovery.discover()
+            self._set_state(ConnectionState.CONNECTING)
+            try:
+                async with LcuClient(self.credentials, self.metrics) as self.client:
+                    async with self.client.ws_connect() as ws:
+                        for subscription_message in self.event_dispatcher.subscription_messages():
+                            await ws.send_json(subscription_message)
+                        self._set_state(ConnectionState.CONNECTED)
+                        attempt = 0
+                        if self.on_connected:
+                            self.on_connected()
+
+                        # a client that is killed can leave the websocket open, so its lockfile and process are watched too
+                        exit_task = asyncio.create_task(self._close_on_exit(ws))
+                        try:
+                            async for msg in ws:
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    self.event_dispatcher.dispatch(msg.data)
+                        finally:
+                            exit_task.cancel()
+                            await asyncio.gather(exit_task, return_exceptions=True)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                pass
+            finally:
+                self.client = None
+                self._set_state(ConnectionState.DISCONNECTED)
+
+            await asyncio.sleep(self.get_retry_delay(attempt))
+            attempt += 1
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            'state': self.state.name,
+            'connections': self.connection_count,
+            'transitions': list(self.transitions),
+            'reconnect_durations': list(self.reconnect_durations)
+        }
@@ -0,0 +1,74 @@
+import json
+import traceback
+from collections.abc import Callable
+from typing import Any
+
+from metrics import Metrics, NULL_METRICS
+
+SUBSCRIBE_OPCODE = 5
+EVENT_OPCODE = 8
+
+EventHandler = Callable[[Any, str, str], Any]
+
+
+def event_name(uri_prefix: str) -> str:
+    return f"OnJsonApiEvent{uri_prefix.replace('/', '_')}"
+
+
+class EventDispatcher:
+    def __init__(self, metrics: Metrics = NULL_METRICS):
+        self.metrics = metrics
+        self._handlers: dict[str, EventHandler] = {}
+        self._markers: tuple[str, ...] = ()
+        self.decoded_count = 0
+        self.dropped_count = 0
+        self.unhandled_count = 0
+        self.error_count = 0
+
+    def _find_uri_prefix(self, uri: str) -> str | None:
+        prefix = uri
+        while prefix:
+            if prefix in self._handlers:
+                return prefix
+            prefix = prefix.rpartition('/')[0]
+
+    def dispatch(self, raw_message: str) -> Any:
+        # the uri is in every event frame as plain text, so frames of other endpoints are dropped without decoding them
+        if not any(marker in raw_message for marker in self._markers):
+            self.dropped_count += 1
+            return
+
+        try:
+            opcode, _, event = json.loads(raw_message)
+            uri = event['uri']
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self.dropped_count += 1
+            return
+        self.decoded_count += 1
+
+        if opcode != EVENT_OPCODE or not (uri_prefix := self._find_uri_prefix(uri)):
+            self.unhandled_count += 1
+            return
+
+        self.metrics.increment('lcu_events', uri_prefix)
+        # a handler failing on an unexpected frame must not end the connection that dispatches the next ones
+        try:
+            return self._handlers[uri_prefix](event.get('data'), event.get('eventType'), uri)
+        except Exception:
+            self.error_count += 1
+            traceback.print_exc()
+
+    @property
+    def event_names(self) -> list[str]:
+        return [event_name(uri_prefix) for uri_prefix in self._handlers]
+
+    def register(self, uri_prefix: str, handler: EventHandler):
+        self._handlers[uri_prefix.rstrip('/')] = handler
+        self._markers = tuple(self._handlers)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'decoded': self.decoded_count, 'dropped': self.dropped_count, 'unhandled': self.unhandled_count, 'errors': self.error_count}
+
+    def subscription_messages(self) -> list[list]:
+        return [[SUBSCRIBE_OPCODE, name] for name in self.event_names]
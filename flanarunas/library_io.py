@@ -0,0 +1,200 @@
+# streaming import and export of the saved pages as json or ndjson, a page without 'championId' goes to the champion of
+# its name or to the unassigned ones, legacy data.json files are accepted too. use it while FlanaRunas is closed
+#
+#     python library_io.py export pages.ndjson
+#     python library_io.py import pages.ndjson
+
+import argparse
+import itertools
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+import constants
+from champion_registry import ChampionRegistry
+from ddragon_cache import DataDragonCache
+from models.rune_page import RunePage
+from models.score_match import ScoreMatch
+from rune_page_names import RunePageNames, SUFFIX_PATTERN
+from storage import Storage
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    renamed: int = 0
+    duplicated: int = 0
+    unassigned: int = 0
+    invalid: int = 0
+
+
+class _ChampionState:
+    def __init__(self, rune_pages: Iterable[RunePage]):
+        self.names = RunePageNames()
+        # hashes instead of the names and runes keep the memory of a big import at a fraction, a collision of the 64 bit
+        # hashes within a champion is unlikely enough to ignore
+        self.page_keys: set[int] = set()
+        for rune_page in rune_pages:
+            self.add(rune_page)
+
+    def add(self, rune_page: RunePage):
+        self.names.add(rune_page.name)
+        self.page_keys.add(page_key(rune_page))
+
+
+def is_ndjson(path: str) -> bool:
+    return path.lower().endswith(NDJSON_EXTENSIONS)
+
+
+def iter_json_array(file: TextIO, chunk_size=constants.READ_CHUNK_SIZE) -> Iterator[Any]:
+    # decodes one element of the top level array at a time, reading more text only when an element is cut
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    is_eof = False
+    is_started = False
+    while True:
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ',' and is_started):
+            position += 1
+        if position < len(buffer):
+            if not is_started:
+                if buffer[position] != '[':
+                    raise ValueError('The file is not a json array')
+                is_started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if is_eof:
+                    raise
+            else:
+                if end < len(buffer) or is_eof:
+                    yield element
+                    position = end
+                    continue
+        elif is_eof:
+            raise ValueError('The json array is not closed')
+
+        buffer = buffer[position:] + (chunk := file.read(chunk_size))
+        position = 0
+        is_eof = not chunk
+
+
+def page_key(rune_page: RunePage) -> int:
+    # the same page imported again under its original name or a suffixed one is a duplicate
+    return hash((SUFFIX_PATTERN.sub('', rune_page.name), rune_page.content_hash))
+
+
+def read_records(path: str) -> Iterator[tuple[int | None, dict[str, Any]]]:
+    with open(path, encoding='utf-8') as file:
+        if is_ndjson(path):
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get('championId'), record
+            return
+
+        first_char = file.read(1)
+        while first_char.isspace():
+            first_char = file.read(1)
+        file.seek(0)
+        if first_char == '{':
+            # legacy data.json, small enough to be loaded at once
+            for champion_id, rune_pages in json.load(file).get('rune_pages', {}).items():
+                for rune_page in rune_pages:
+                    yield int(champion_id), json.loads(rune_page) if isinstance(rune_page, str) else rune_page
+            return
+
+        for record in iter_json_array(file):
+            yield record.get('championId'), record
+
+
+def export_rune_pages(storage: Storage, path: str) -> int:
+    count = 0
+    ndjson = is_ndjson(path)
+    with open(path, 'w', encoding='utf-8') as file:
+        if not ndjson:
+            file.write('[\n')
+        for champion_id in sorted(storage.load_champion_index()):
+            for rune_page in storage.load_champion_rune_pages(champion_id):
+                record = json.dumps({'championId': champion_id, **rune_page.to_dict()}, ensure_ascii=False)
+                if ndjson:
+                    file.write(f'{record}\n')
+                else:
+                    file.write(f',\n{record}' if count else record)
+                count += 1
+        if not ndjson:
+            file.write('\n]\n')
+
+    return count
+
+
+def import_rune_pages(storage: Storage, champions: ChampionRegistry, path: str, batch_size=constants.IMPORT_BATCH_SIZE) -> ImportResult:
+    result = ImportResult()
+    champion_states: dict[int, _ChampionState] = {}
+    scored_words: dict[str, ScoreMatch] = {}
+    records = read_records(path)
+    while batch := list(itertools.islice(records, batch_size)):
+        rune_pages = []
+        champion_ids = []
+        for champion_id, record in batch:
+            try:
+                rune_pages.append(RunePage.from_dict(record))
+            except (KeyError, TypeError, AttributeError):
+                result.invalid += 1
+                continue
+            champion_ids.append(champion_id)
+
+        # the pages without a champion are classified together, each distinct word of their names is matched once per import
+        unknown_indices = [i for i, champion_id in enumerate(champion_ids) if champion_id is None]
+        for i, champion in zip(unknown_indices, champions.match_many((rune_pages[i].name for i in unknown_indices), scored_words)):
+            champion_ids[i] = champion.id if champion else None
+
+        new_rune_pages: dict[int, list[RunePage]] = {}
+        for champion_id, rune_page in zip(champion_ids, rune_pages):
+            if champion_id is None:
+                # kept apart, a later champion list can still classify it
+                champion_id = constants.UNASSIGNED_CHAMPION_ID
+            if (champion_state := champion_states.get(champion_id)) is None:
+                champion_state = champion_states[champion_id] = _ChampionState(storage.load_champion_rune_pages(champion_id))
+
+            if page_key(rune_page) in champion_state.page_keys:
+                result.duplicated += 1
+                continue
+            if champion_state.names.auto_rename(rune_page):
+                result.renamed += 1
+            champion_state.add(rune_page)
+            new_rune_pages.setdefault(champion_id, []).append(rune_page)
+            result.imported += 1
+            if champion_id == constants.UNASSIGNED_CHAMPION_ID:
+                result.unassigned += 1
+
+        storage.append_rune_pages(new_rune_pages)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=('import', 'export'))
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    storage = Storage()
+    try:
+        if args.command == 'export':
+            print(f'{export_rune_pages(storage, args.path)} rune pages exported')
+        else:
+            print(import_rune_pages(storage, ChampionRegistry(DataDragonCache().load()), args.path))
+    finally:
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import cProfile
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass
+
+import constants
+from file_utils import write_atomically
+from metrics import Metrics, NULL_METRICS
+
+
+@dataclass
+class Stall:
+    duration: float
+    started_at: float
+    stack: list[str]
+
+
+class LoopWatchdog:
+    def __init__(self, metrics: Metrics = NULL_METRICS, interval=constants.WATCHDOG_INTERVAL, threshold=constants.STALL_THRESHOLD, history_size=constants.STALL_HISTORY_SIZE):
+        self.metrics = metrics
+        self.interval = interval
+        self.threshold = threshold
+        self.history_size = history_size
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self._worst_stalls: list[tuple[float, int, Stall]] = []
+        self._stall_ids = itertools.count()
+        self._beat = time.monotonic()
+        self._stack: list[str] | None = None
+        self._stack_beat: float | None = None
+        self._loop_thread_id: int | None = None
+
+    def _monitor(self, stop: threading.Event):
+        # the loop thread can't report on itself while it is blocked, so this thread takes its stack in the middle of
+        # the stall and the loop files it with the stall duration once it is back
+        while not stop.wait(self.interval):
+            beat = self._beat
+            if beat != self._stack_beat and time.monotonic() - beat > self.interval + self.threshold:
+                if frame := sys._current_frames().get(self._loop_thread_id):
+                    self._stack = traceback.format_stack(frame)
+                    self._stack_beat = beat
+
+    def _record_stall(self, lag: float, beat: float):
+        self.stall_count += 1
+        self.metrics.increment('loop_stalls')
+        stack = self._stack if self._stack_beat == beat else []
+        heapq.heappush(self._worst_stalls, (lag, next(self._stall_ids), Stall(lag, time.time() - lag, stack)))
+        if len(self._worst_stalls) > self.history_size:
+            heapq.heappop(self._worst_stalls)
+
+    def dump(self, path: str):
+        write_atomically(path, json.dumps(self.stats, indent=4))
+
+    async def run(self):
+        self._loop_thread_id = threading.get_ident()
+        # each run stops its own thread, a restarted watchdog doesn't revive the thread of the previous run
+        stop = threading.Event()
+        threading.Thread(target=self._monitor, args=(stop,), name='LoopWatchdog', daemon=True).start()
+        try:
+            while True:
+                beat = self._beat = time.monotonic()
+                await asyncio.sleep(self.interval)
+                lag = time.monotonic() - beat - self.interval
+                self.max_lag = max(self.max_lag, lag)
+                self.metrics.observe('loop_lag_seconds', max(lag, 0.0))
+                if lag > self.threshold:
+                    self._record_stall(lag, beat)
+        finally:
+            stop.set()
+
+    @property
+    def stalls(self) -> list[Stall]:
+        return [stall for _, _, stall in sorted(self._worst_stalls, reverse=True)]
+
+    @property
+    def stats(self) -> dict:
+        return {'stalls': self.stall_count, 'max_lag': self.max_lag, 'worst_stalls': [asdict(stall) for stall in self.stalls]}
+
+
+class Profiler:
+    def __init__(self, directory=constants.PROFILES_PATH):
+        self.directory = directory
+        self._profile: cProfile.Profile | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._profile is not None
+
+    def start(self):
+        if self._profile:
+            return
+
+        # cProfile only sees the thread that enables it, which is the loop thread that runs both asyncio and Qt
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> str | None:
+        if not self._profile:
+            return
+
+        self._profile.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"flanarunas-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self._profile.dump_stats(path)
+        self._profile = None
+        return path
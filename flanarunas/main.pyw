@@ -1,6 +1,19 @@
 import asyncio
 
-from flana_runas import FlanaRunas
+from my_qt.app import MyQtApp
 
 if __name__ == '__main__':
-    asyncio.run(FlanaRunas().run())
+    qt_app = MyQtApp()
+    # the window is painted before importing the rest of the app, which takes most of the startup
+    qt_app.processEvents()
+
+    from flana_runas import FlanaRunas
+    from my_qt.event_loop import QtEventLoop
+
+    flana_runas = FlanaRunas(qt_app)
+    loop = QtEventLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(flana_runas.run())
+    finally:
+        loop.close()
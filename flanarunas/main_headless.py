@@ -0,0 +1,26 @@
+import asyncio
+import signal
+
+from core import FlanaRunasCore
+
+
+async def main():
+    flana_runas = FlanaRunasCore()
+    main_task = asyncio.current_task()
+    for signal_ in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_, main_task.cancel)
+        except NotImplementedError:
+            pass
+
+    try:
+        await flana_runas.run()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        # the queued writes are flushed before leaving
+        flana_runas.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+import asyncio
+import bisect
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import constants
+from file_utils import write_atomically
+
+# upper bounds in seconds, from 50 µs to about 100 s growing by 2x
+HISTOGRAM_BOUNDS = tuple(0.00005 * 2 ** i for i in range(22))
+
+
+class Histogram:
+    def __init__(self, bounds: tuple[float, ...] = HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        accumulated = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            accumulated += bucket_count
+            if accumulated >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        if not self.count:
+            return {'count': 0}
+
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+
+class Metrics:
+    is_enabled = True
+
+    def __init__(self):
+        self.counters: dict[tuple[str, str | None], int] = {}
+        self.histograms: dict[tuple[str, str | None], Histogram] = {}
+        self.gauges: dict[str, Callable[[], Any]] = {}
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def add_collector(self, name: str, collector: Callable[[], dict]):
+        self.collectors[name] = collector
+
+    def increment(self, name: str, label: str = None, value=1):
+        key = (name, label)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, label: str = None):
+        key = (name, label)
+        with self._lock:
+            if (histogram := self.histograms.get(key)) is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def set_gauge(self, name: str, gauge: Callable[[], Any]):
+        self.gauges[name] = gauge
+
+    def snapshot(self) -> dict[str, Any]:
+        def nest(values: dict[tuple[str, str | None], Any]) -> dict[str, Any]:
+            nested = {}
+            for (name, label), value in sorted(values.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+                if label is None:
+                    nested[name] = value
+                else:
+                    nested.setdefault(name, {})[label] = value
+            return nested
+
+        with self._lock:
+            counters = nest(self.counters)
+            histograms = nest({key: histogram.snapshot() for key, histogram in self.histograms.items()})
+
+        return {
+            'time': time.time(),
+            'uptime': time.time() - self.started_at,
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': {name: gauge() for name, gauge in self.gauges.items()},
+            **{name: collector() for name, collector in self.collectors.items()}
+        }
+
+    @contextlib.contextmanager
+    def time(self, name: str, label: str = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, label)
+
+
+class NullMetrics(Metrics):
+    is_enabled = False
+
+    def __init__(self):
+        super().__init__()
+        self._null_context = contextlib.nullcontext()
+
+    def add_collector(self, name: str, collector: Callable[[], dict]):
+        pass
+
+    def increment(self, name: str, label: str = None, value=1):
+        pass
+
+    def observe(self, name: str, value: float, label: str = None):
+        pass
+
+    def set_gauge(self, name: str, gauge: Callable[[], Any]):
+        pass
+
+    def time(self, name: str, label: str = None) -> contextlib.nullcontext:
+        return self._null_context
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsExporter:
+    def __init__(self, metrics: Metrics, snapshot_path: str = None, port: int = None, interval=constants.METRICS_SNAPSHOT_INTERVAL):
+        self.metrics = metrics
+        self.snapshot_path = snapshot_path
+        self.port = port
+        self.interval = interval
+
+    @classmethod
+    def from_environment(cls) -> 'MetricsExporter':
+        snapshot_path = os.environ.get(constants.METRICS_FILE_ENV)
+        port = None
+        if port_text := os.environ.get(constants.METRICS_PORT_ENV):
+            try:
+                port = int(port_text)
+                if not 0 < port < 65536:
+                    raise ValueError
+            except ValueError:
+                # a typo in the port doesn't stop the app, the metrics only go to the file if there is one
+                print(f'{constants.METRICS_PORT_ENV}={port_text!r} is not a port number, the metrics are not served', file=sys.stderr)
+                port = None
+        return cls(Metrics() if snapshot_path or port else NULL_METRICS, snapshot_path, port)
+
+    async def _serve(self):
+        from aiohttp import web
+
+        async def handle_metrics(_request: web.Request) -> web.Response:
+            return web.json_response(self.metrics.snapshot())
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        # only reachable from this machine
+        await web.TCPSite(runner, '127.0.0.1', self.port).start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    def close(self):
+        if self.metrics.is_enabled and self.snapshot_path:
+            self.dump()
+
+    def dump(self):
+        write_atomically(self.snapshot_path, json.dumps(self.metrics.snapshot(), indent=4))
+
+    async def run(self):
+        if not self.metrics.is_enabled:
+            return
+
+        tasks = []
+        if self.port:
+            tasks.append(asyncio.create_task(self._serve()))
+        try:
+            while self.snapshot_path:
+                await asyncio.sleep(self.interval)
+                try:
+                    self.dump()
+                except OSError:
+                    pass
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
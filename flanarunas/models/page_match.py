@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PageMatch:
+    champion_id: int | None
+    word_index: int
+    score: float
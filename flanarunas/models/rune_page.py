@@ -1,25 +1,44 @@
-from dataclasses import dataclass
+import hashlib
+import json
+from collections.abc import Iterable
 from typing import Any
 
-from flanautils import FlanaBase
 
+def content_hash(primary_style_id: int | None, sub_style_id: int | None, selected_perk_ids: Iterable[int]) -> int:
+    # stable between runs unlike hash(), and a signed 64 bit integer so sqlite stores it as an integer key
+    text = repr((primary_style_id, sub_style_id, tuple(selected_perk_ids)))
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big', signed=True)
 
-@dataclass(unsafe_hash=True)
-class RunePage(FlanaBase):
-    isActive: bool
-    _name: str
-    order: int
-    primaryStyleId: int
-    subStyleId: int
-    selectedPerkIds: list[int]
 
-    def __init__(self, isActive=False, name='', order=None, primaryStyleId=None, subStyleId=None, selectedPerkIds=None):
+class RunePage:
+    # the fields compared by __eq__ change with renames and edits, so a page can't be kept in a set or as a dict key.
+    # content_hash is the key of its runes
+    __hash__ = None
+    __slots__ = ('isActive', '_name', 'order', 'primaryStyleId', 'subStyleId', '_selectedPerkIds', '_json', '_json_key', '_content_hash', '_content_hash_key')
+
+    def __init__(self, isActive=False, name='', order=None, primaryStyleId=None, subStyleId=None, selectedPerkIds: Iterable[int] = ()):
         self.isActive = isActive
-        self.name = name
+        self._name = self._format_name(name)
         self.order = order
         self.primaryStyleId = primaryStyleId
         self.subStyleId = subStyleId
-        self.selectedPerkIds = selectedPerkIds or []
+        self._selectedPerkIds = tuple(selectedPerkIds or ())
+        self._json: str | None = None
+        self._json_key: tuple | None = None
+        self._content_hash: int | None = None
+        self._content_hash_key: tuple | None = None
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields == other._fields
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({", ".join(repr(field) for field in self._fields)})'
+
+    @property
+    def _fields(self) -> tuple:
+        return self.isActive, self._name, self.order, self.primaryStyleId, self.subStyleId, self._selectedPerkIds
 
     @staticmethod
     def _format_name(rune_page_name: str) -> str:
@@ -28,13 +47,80 @@ class RunePage(FlanaBase):
 
         return f'F: {rune_page_name}'
 
-    def _json_repr(self) -> Any:
-        return {k.strip('_'): v for k, v in vars(self).items()}
+    @property
+    def content_hash(self) -> int:
+        # the runes without the name, the pages with the same runes share one stored body. The perks invalidate the cache
+        # when they are set, the style ids are checked on every call
+        content_hash_key = (self.primaryStyleId, self.subStyleId)
+        if self._content_hash is None or self._content_hash_key != content_hash_key:
+            self._content_hash = content_hash(self.primaryStyleId, self.subStyleId, self._selectedPerkIds)
+            self._content_hash_key = content_hash_key
+        return self._content_hash
+
+    def deep_copy(self) -> 'RunePage':
+        # every field is immutable, so sharing them (and the cached json) is as good as a deep copy
+        rune_page = object.__new__(self.__class__)
+        rune_page.isActive = self.isActive
+        rune_page._name = self._name
+        rune_page.order = self.order
+        rune_page.primaryStyleId = self.primaryStyleId
+        rune_page.subStyleId = self.subStyleId
+        rune_page._selectedPerkIds = self._selectedPerkIds
+        rune_page._json = self._json
+        rune_page._json_key = self._json_key
+        rune_page._content_hash = self._content_hash
+        rune_page._content_hash_key = self._content_hash_key
+        return rune_page
+
+    @staticmethod
+    def decode_many(text: str) -> list['RunePage']:
+        return [RunePage.from_dict(page) for page in json.loads(text)]
+
+    @staticmethod
+    def encode_many(rune_pages: Iterable['RunePage']) -> str:
+        return f"[{', '.join(rune_page.to_json() for rune_page in rune_pages)}]"
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'RunePage':
+        return cls(data['isActive'], data['name'], data['order'], data['primaryStyleId'], data['subStyleId'], data['selectedPerkIds'])
+
+    @classmethod
+    def from_json(cls, text: str) -> 'RunePage':
+        return cls.from_dict(json.loads(text))
 
     @property
-    def name(self):
+    def name(self) -> str:
         return self._name
 
     @name.setter
     def name(self, text: str):
         self._name = self._format_name(text)
+        self._json = None
+
+    @property
+    def selectedPerkIds(self) -> tuple[int, ...]:
+        return self._selectedPerkIds
+
+    @selectedPerkIds.setter
+    def selectedPerkIds(self, selected_perk_ids: Iterable[int]):
+        self._selectedPerkIds = tuple(selected_perk_ids)
+        self._json = None
+        self._content_hash = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'isActive': self.isActive,
+            'name': self._name,
+            'order': self.order,
+            'primaryStyleId': self.primaryStyleId,
+            'subStyleId': self.subStyleId,
+            'selectedPerkIds': list(self._selectedPerkIds)
+        }
+
+    def to_json(self) -> str:
+        # the name and the perks invalidate the cache when they are set, the plain fields are checked on every call
+        json_key = (self.isActive, self.order, self.primaryStyleId, self.subStyleId)
+        if self._json is None or self._json_key != json_key:
+            self._json = json.dumps(self.to_dict())
+            self._json_key = json_key
+        return self._json
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ScoreMatch:
+    element: Any
+    score: float
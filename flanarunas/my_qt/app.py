@@ -1,8 +1,7 @@
-import asyncio
-
 from PySide6 import QtWidgets
 
 from my_qt.combo_boxes import ComboSearch
+from my_qt.widgets import ListRunePages
 from my_qt.windows import MyWindow
 
 
@@ -32,16 +31,8 @@ class MyQtApp(QtWidgets.QApplication):
         return self.window.central_widget.combo_search
 
     @property
-    def list_rune_pages(self) -> QtWidgets.QListWidget:
+    def list_rune_pages(self) -> ListRunePages:
         return self.window.central_widget.list_rune_pages
 
-    def run(self):
-        async def run():
-            while True:
-                self.processEvents()
-                await asyncio.sleep(0)
-
-        asyncio.create_task(run())
-
     def set_list_rune_pages_visibility(self, is_visible):
         self.window.central_widget.set_list_rune_pages_visibility(is_visible)
@@ -1,5 +1,8 @@
 from PySide6 import QtCore, QtGui, QtWidgets
 
+import constants
+from search import SearchIndex
+
 
 class ComboSearch(QtWidgets.QComboBox):
     # noinspection PyUnresolvedReferences
@@ -7,7 +10,7 @@ class ComboSearch(QtWidgets.QComboBox):
         super().__init__(parent)
         self.setEditable(True)
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
-        self._items = items or []
+        self.search_index = SearchIndex(items or ())
         font = QtGui.QFont()
         font.setPointSize(14)
 
@@ -28,11 +31,22 @@ class ComboSearch(QtWidgets.QComboBox):
         self.completer.popup().activated.connect(lambda x: print(1, x))
 
     def add_item(self, item: str):
-        self.items += [item]
+        if item in self.search_index:
+            return
+
+        self.blockSignals(True)
+        text = self.lineEdit().text()
+        self.insertItem(self.search_index.add(item), item)
+        self.lineEdit().setText(text)
+        self.blockSignals(False)
 
     def delete_item(self, name: str):
-        self._items.remove(name)
-        self.items = self._items
+        if (row := self.search_index.remove(name)) is None:
+            return
+
+        self.blockSignals(True)
+        self.removeItem(row)
+        self.blockSignals(False)
 
     def event(self, event: QtCore.QEvent) -> bool:
         if isinstance(event, QtGui.QKeyEvent) and event.key() == QtCore.Qt.Key_Tab and event.type() == QtCore.QEvent.KeyPress:
@@ -43,15 +57,15 @@ class ComboSearch(QtWidgets.QComboBox):
         return super().event(event)
 
     @property
-    def items(self):
-        return self._items
+    def items(self) -> list[str]:
+        return self.search_index.items
 
     @items.setter
     def items(self, items):
         self.blockSignals(True)
         text = self.lineEdit().text()
         self.clear()
-        self._items = sorted(items)
+        self.search_index = SearchIndex(items)
         self.addItems(self.items)
         self.lineEdit().setText(text)
         self.blockSignals(False)
@@ -61,9 +75,7 @@ class ComboSearch(QtWidgets.QComboBox):
         # self._set_cursor_start()
 
     def _set_completer_items(self):
-        items = self.items.copy()
-        items = [item for item in items if self.currentText().lower() in item.lower()]
-        self.completer.model().setStringList(items)
+        self.completer.model().setStringList(self.search_index.search(self.currentText(), constants.SEARCH_RESULT_LIMIT))
 
     # def _set_cursor_start(self):
     #     self.lineEdit().setCursorPosition(0)
@@ -0,0 +1,96 @@
+import asyncio
+import math
+import selectors
+
+from PySide6 import QtCore
+
+
+class QtSelector(selectors.BaseSelector):
+    # waits inside a qt event loop: the asyncio file descriptors get a QSocketNotifier and the select timeout is a QTimer,
+    # so the thread sleeps in qt until asyncio i/o or a qt event wakes it up
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._notifiers: dict[int, list[QtCore.QSocketNotifier]] = {}
+        self._qt_event_loop = QtCore.QEventLoop()
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._qt_event_loop.quit)
+        self.is_waiting = False
+
+    def _add_notifiers(self, key: selectors.SelectorKey):
+        notifiers = []
+        if key.events & selectors.EVENT_READ:
+            notifiers.append(QtCore.QSocketNotifier(key.fd, QtCore.QSocketNotifier.Read))
+        if key.events & selectors.EVENT_WRITE:
+            notifiers.append(QtCore.QSocketNotifier(key.fd, QtCore.QSocketNotifier.Write))
+        for notifier in notifiers:
+            notifier.activated.connect(self.wake_up)
+        self._notifiers[key.fd] = notifiers
+
+    def _remove_notifiers(self, key: selectors.SelectorKey):
+        for notifier in self._notifiers.pop(key.fd, ()):
+            notifier.setEnabled(False)
+            notifier.deleteLater()
+
+    def close(self):
+        for key in list(self._selector.get_map().values()):
+            self._remove_notifiers(key)
+        self._selector.close()
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def modify(self, fileobj, events, data=None) -> selectors.SelectorKey:
+        self._remove_notifiers(self._selector.get_key(fileobj))
+        key = self._selector.modify(fileobj, events, data)
+        self._add_notifiers(key)
+        return key
+
+    def register(self, fileobj, events, data=None) -> selectors.SelectorKey:
+        key = self._selector.register(fileobj, events, data)
+        self._add_notifiers(key)
+        return key
+
+    def select(self, timeout: float = None) -> list[tuple[selectors.SelectorKey, int]]:
+        if (ready := self._selector.select(0)) or timeout is not None and timeout <= 0:
+            QtCore.QCoreApplication.processEvents()
+            return ready or self._selector.select(0)
+
+        if timeout is not None:
+            self._timer.start(min(math.ceil(timeout * 1000), 2 ** 31 - 1))
+        self.is_waiting = True
+        try:
+            self._qt_event_loop.exec()
+        finally:
+            self.is_waiting = False
+            self._timer.stop()
+
+        return self._selector.select(0)
+
+    def unregister(self, fileobj) -> selectors.SelectorKey:
+        key = self._selector.unregister(fileobj)
+        self._remove_notifiers(key)
+        return key
+
+    def wake_up(self):
+        if self.is_waiting:
+            self._qt_event_loop.quit()
+
+
+class QtEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self._qt_selector = QtSelector()
+        super().__init__(self._qt_selector)
+
+    # callbacks scheduled from Qt slots run while the selector is waiting in Qt, so it has to stop waiting to run them
+    def call_at(self, *args, **kwargs) -> asyncio.TimerHandle:
+        handle = super().call_at(*args, **kwargs)
+        self._qt_selector.wake_up()
+        return handle
+
+    def call_soon(self, *args, **kwargs) -> asyncio.Handle:
+        handle = super().call_soon(*args, **kwargs)
+        self._qt_selector.wake_up()
+        return handle
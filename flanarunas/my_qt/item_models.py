@@ -0,0 +1,98 @@
+from typing import Any
+
+from PySide6 import QtCore
+
+from models.rune_page import RunePage
+from rune_page_names import RunePageNames
+
+
+class RunePageListModel(QtCore.QAbstractListModel):
+    edited = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rune_pages: list[RunePage] = []
+
+    def append_rune_page(self, rune_page: RunePage):
+        self.beginInsertRows(QtCore.QModelIndex(), len(self.rune_pages), len(self.rune_pages))
+        self.rune_pages.append(rune_page)
+        self.endInsertRows()
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.rune_pages[index.row()].name
+        if role == QtCore.Qt.UserRole:
+            return self.rune_pages[index.row()]
+
+    def duplicate_rows(self, rows: list[int]):
+        names = RunePageNames(rune_page.name for rune_page in self.rune_pages)
+        for inserted_count, row in enumerate(sorted(rows)):
+            row += inserted_count
+            rune_page = self.rune_pages[row].deep_copy()
+            names.auto_rename(rune_page)
+            names.add(rune_page.name)
+            self.beginInsertRows(QtCore.QModelIndex(), row + 1, row + 1)
+            self.rune_pages.insert(row + 1, rune_page)
+            self.endInsertRows()
+
+        self.edited.emit()
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        if not index.isValid():
+            return QtCore.Qt.ItemIsDropEnabled
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsDragEnabled
+
+    def moveRows(self, source_parent: QtCore.QModelIndex, source_row: int, count: int, destination_parent: QtCore.QModelIndex, destination_child: int) -> bool:
+        if source_parent.isValid() or destination_parent.isValid() or source_row <= destination_child <= source_row + count:
+            return False
+
+        self.beginMoveRows(source_parent, source_row, source_row + count - 1, destination_parent, destination_child)
+        moved_rune_pages = self.rune_pages[source_row:source_row + count]
+        del self.rune_pages[source_row:source_row + count]
+        if destination_child > source_row:
+            destination_child -= count
+        self.rune_pages[destination_child:destination_child] = moved_rune_pages
+        self.endMoveRows()
+
+        self.edited.emit()
+        return True
+
+    def remove_rows(self, rows: list[int]):
+        for row in sorted(rows, reverse=True):
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.rune_pages[row]
+            self.endRemoveRows()
+
+        self.edited.emit()
+
+    def replace_rune_page(self, row: int, rune_page: RunePage):
+        self.rune_pages[row] = rune_page
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rune_pages)
+
+    def setData(self, index: QtCore.QModelIndex, value: Any, role=QtCore.Qt.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+
+        self.rune_pages[index.row()].name = value
+        self.dataChanged.emit(index, index)
+        self.edited.emit()
+        return True
+
+    def set_rune_pages(self, rune_pages: list[RunePage]):
+        # the model works on the list it is given, so the same list of the current champion doesn't need a reset
+        if rune_pages is self.rune_pages:
+            return
+
+        self.beginResetModel()
+        self.rune_pages = rune_pages
+        self.endResetModel()
+
+    def supportedDropActions(self) -> QtCore.Qt.DropActions:
+        return QtCore.Qt.MoveAction
@@ -1,17 +1,17 @@
-import re
-from typing import Iterable
-
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from models.rune_page import RunePage
 from my_qt import ui_loader
 from my_qt.combo_boxes import ComboSearch
+from my_qt.item_models import RunePageListModel
 
 
-class ListRunePages(QtWidgets.QListWidget):
+class ListRunePages(QtWidgets.QListView):
     def __init__(self, parent):
         super().__init__(parent)
         self.controller = None
+        self.model_ = RunePageListModel(self)
+        self.setModel(self.model_)
         self.action_delete = QtGui.QAction('Eliminar')
         self.action_duplicate = QtGui.QAction('Duplicar')
         self.delete_shortcut = QtGui.QShortcut(QtGui.QKeySequence.Delete, self)
@@ -26,31 +26,19 @@ class ListRunePages(QtWidgets.QListWidget):
 
     def connect_signals(self, controller):
         self.controller = controller
-        self.itemChanged.connect(self.on_item_changed)
-
-    def _auto_rename_item(self, item: QtWidgets.QListWidgetItem):
-        def get_suffix_number(text: str) -> int:
-            try:
-                return int(re.findall(r'(_\d+)+', text)[0].strip('_'))
-            except IndexError:
-                return 0
-
-        item_names = [item_.data_.name for item_ in self.items_]
-        next_suffix_number = max(get_suffix_number(item_name) for item_name in item_names) + 1
-        if item.data_.name in item_names:
-            if get_suffix_number(item.data_.name):
-                item.data_.name = re.sub(r'(_\d+)+', '', item.data_.name)
-            item.data_.name = f'{item.data_.name}_{next_suffix_number}'
-            item.setText(item.data_.name)
+        self.model_.edited.connect(controller.update_runes)
+
+    def _selected_rows(self) -> list[int]:
+        return sorted({index.row() for index in self.selectedIndexes()})
 
     def contextMenuEvent(self, event: QtGui.QContextMenuEvent):
-        if not self.selectedItems():
+        if not self.selectedIndexes():
             return
 
         self.menu.exec(event.globalPos())
 
     def delete_selected_items(self):
-        if not self.selectedItems():
+        if not self.selectedIndexes():
             return
 
         message_box = QtWidgets.QMessageBox(parent=self)
@@ -63,44 +51,19 @@ class ListRunePages(QtWidgets.QListWidget):
         if message_box.exec():
             return
 
-        for item in self.selectedItems():
-            self.takeItem(self.row(item))
-
-        self.controller.update_runes()
-
-    def dropEvent(self, event: QtGui.QDropEvent):
-        super().dropEvent(event)
-        self.controller.update_runes()
+        self.model_.remove_rows(self._selected_rows())
 
     def duplicate_selected_items(self):
-        for item in self.selectedItems():
-            new_item = item.clone()
-            new_item.data_ = item.data_.deep_copy()
-            self._auto_rename_item(new_item)
-            self.insertItem(self.row(item) + 1, new_item)
-
-        self.controller.update_runes()
+        if rows := self._selected_rows():
+            self.model_.duplicate_rows(rows)
 
     @property
-    def items_(self) -> list[QtWidgets.QListWidgetItem]:
-        return [self.item(i) for i in range(self.count())]
-
-    @items_.setter
-    def items_(self, rune_pages: Iterable[RunePage]):
-        self.clear()
-        for rune_page in rune_pages:
-            item = QtWidgets.QListWidgetItem(rune_page.name)
-            item.data_ = rune_page
-            item.setFlags(item.flags() | QtCore.Qt.ItemIsEditable)
-            self.addItem(item)
-
-    def on_item_changed(self, item: QtWidgets.QListWidgetItem):
-        item.data_.name = item.text()
-        self.blockSignals(True)
-        item.setText(item.data_.name)
-        self.blockSignals(False)
+    def rune_pages(self) -> list[RunePage]:
+        return self.model_.rune_pages
 
-        self.controller.update_runes()
+    @rune_pages.setter
+    def rune_pages(self, rune_pages: list[RunePage]):
+        self.model_.set_rune_pages(rune_pages)
 
 
 class MyCentralWidget(QtWidgets.QWidget):
@@ -128,8 +91,8 @@ class MyCentralWidget(QtWidgets.QWidget):
         # noinspection PyUnresolvedReferences
         self.button_show.clicked.connect(self.window().resize_, QtCore.Qt.QueuedConnection)
 
-        self.check_box_auto_selection.stateChanged.connect(controller.save_data)
-        self.check_box_recommended_pages.stateChanged.connect(controller.save_data)
+        self.check_box_auto_selection.stateChanged.connect(controller.save_config)
+        self.check_box_recommended_pages.stateChanged.connect(controller.save_config)
 
         self.combo_search.currentTextChanged.connect(controller.on_current_text_changed)
 
@@ -145,4 +108,4 @@ class MyCentralWidget(QtWidgets.QWidget):
             self.button_show.setText('🠗🠗🠗 Páginas de runas 🠗🠗🠗')
 
         if self.controller:
-            self.controller.save_data()
+            self.controller.save_config()
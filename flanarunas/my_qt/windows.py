@@ -13,6 +13,7 @@ class MyWindow(QtWidgets.QMainWindow):
         self.icon = QtGui.QIcon('resources/logo.png')
         self.setWindowTitle('FlanaRunas')
         self.setWindowIcon(self.icon)
+        self.profiling_shortcut = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+Alt+Shift+P'), self)
 
         self.central_widget = MyCentralWidget(self)
         self.setCentralWidget(self.central_widget)
@@ -22,21 +23,15 @@ class MyWindow(QtWidgets.QMainWindow):
     def connect_signals(self, controller):
         self.controller = controller
 
+        self.profiling_shortcut.activated.connect(controller.toggle_profiling)
         self.central_widget.connect_signals(controller)
 
     def closeEvent(self, event) -> None:
         super().closeEvent(event)
+        if self.controller:
+            self.controller.close()
         sys.exit()
 
-    def enterEvent(self, event: QtGui.QEnterEvent):
-        super().enterEvent(event)
-
-        if self.controller.current_champion:
-            selected_rune_pages = self.controller.saved_rune_pages.get(self.controller.current_champion.id, [])
-            self.central_widget.list_rune_pages.items_ = selected_rune_pages
-        else:
-            self.central_widget.list_rune_pages.clear()
-
     def resize_(self):
         width = self.width()
         self.adjustSize()
@@ -1,7 +1,189 @@
 import asyncio
+import ctypes
+import ctypes.util
+import os
+import sys
 from collections.abc import Iterable
+from dataclasses import dataclass
 
-import psutil
+import constants
+from exceptions import LcuDiscoveryError
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+@dataclass(frozen=True)
+class LcuCredentials:
+    port: str
+    auth_key: str
+    pid: int | None = None
+    lockfile_path: str | None = None
+
+
+class DirectoryWatcher:
+    # inotify is only available on linux, elsewhere is_watching is false and the callers fall back to polling
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._event = asyncio.Event()
+        self._file_descriptor: int | None = None
+        if not sys.platform.startswith('linux') or not os.path.isdir(directory):
+            return
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            file_descriptor = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if file_descriptor < 0:
+                return
+            if libc.inotify_add_watch(file_descriptor, os.fsencode(directory), IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE) < 0:
+                os.close(file_descriptor)
+                return
+            asyncio.get_running_loop().add_reader(file_descriptor, self._on_readable)
+        except (AttributeError, NotImplementedError, OSError):
+            return
+        self._file_descriptor = file_descriptor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _on_readable(self):
+        try:
+            while os.read(self._file_descriptor, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self._event.set()
+
+    @property
+    def is_watching(self) -> bool:
+        return self._file_descriptor is not None
+
+    def close(self):
+        if self._file_descriptor is None:
+            return
+
+        asyncio.get_running_loop().remove_reader(self._file_descriptor)
+        os.close(self._file_descriptor)
+        self._file_descriptor = None
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+class LcuDiscovery:
+    def __init__(
+        self,
+        port: str = None,
+        auth_key: str = None,
+        lockfile_path: str = None,
+        process_names: Iterable[str] = constants.LCU_PROCESS_NAMES,
+        min_delay=constants.DISCOVERY_MIN_DELAY,
+        max_delay=constants.DISCOVERY_MAX_DELAY
+    ):
+        if bool(port) != bool(auth_key):
+            raise LcuDiscoveryError(f'{constants.LCU_PORT_ENV} and {constants.LCU_AUTH_KEY_ENV} have to be set together')
+
+        self.port = port
+        self.auth_key = auth_key
+        self.lockfile_path = lockfile_path
+        self.process_names = tuple(process_names)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_environment(cls) -> 'LcuDiscovery':
+        return cls(os.environ.get(constants.LCU_PORT_ENV), os.environ.get(constants.LCU_AUTH_KEY_ENV), os.environ.get(constants.LCU_LOCKFILE_ENV))
+
+    @property
+    def _lockfile_paths(self) -> list[str]:
+        if self.lockfile_path:
+            return [self.lockfile_path]
+        return list(constants.LCU_LOCKFILE_PATHS)
+
+    async def discover(self) -> LcuCredentials:
+        if credentials := self.find():
+            return credentials
+
+        delay = self.min_delay
+        with DirectoryWatcher(os.path.dirname(self._lockfile_paths[0]) if self._lockfile_paths else '') as watcher:
+            while not (credentials := self.find()):
+                if watcher.is_watching:
+                    # the lockfile is written when the client starts, so the process table is only scanned again on
+                    # changes in its directory or after the longest delay
+                    await watcher.wait(self.max_delay)
+                else:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * constants.DISCOVERY_BACKOFF_FACTOR, self.max_delay)
+
+        return credentials
+
+    def find(self) -> LcuCredentials | None:
+        if self.port and self.auth_key:
+            return LcuCredentials(self.port, self.auth_key)
+
+        import psutil
+
+        for lockfile_path in self._lockfile_paths:
+            # a client that crashed leaves its lockfile behind
+            if (credentials := read_lockfile(lockfile_path)) and psutil.pid_exists(credentials.pid):
+                self.lockfile_path = lockfile_path
+                return credentials
+
+        if not (process := return_process(self.process_names)):
+            return None
+
+        try:
+            cli_args = process.cmdline()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        if not (auth_key := find_auth_key(cli_args)) or not (port := find_port(cli_args)):
+            return None
+
+        try:
+            self.lockfile_path = os.path.join(os.path.dirname(process.exe()), 'lockfile')
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return LcuCredentials(port, auth_key, process.pid, self.lockfile_path)
+
+    @staticmethod
+    def is_alive(credentials: LcuCredentials) -> bool:
+        if credentials.lockfile_path:
+            lockfile_credentials = read_lockfile(credentials.lockfile_path)
+            if not lockfile_credentials or (lockfile_credentials.port, lockfile_credentials.auth_key) != (credentials.port, credentials.auth_key):
+                return False
+        if credentials.pid is not None:
+            import psutil
+
+            return psutil.pid_exists(credentials.pid)
+        return True
+
+    async def wait_for_exit(self, credentials: LcuCredentials):
+        if credentials.pid is None and not credentials.lockfile_path:
+            # the credentials given in the environment have no process or lockfile to watch, only their port
+            while await is_port_open(credentials.port):
+                await asyncio.sleep(self.max_delay)
+            return
+
+        lockfile_directory = os.path.dirname(credentials.lockfile_path) if credentials.lockfile_path else ''
+        with DirectoryWatcher(lockfile_directory) as watcher:
+            while self.is_alive(credentials):
+                if watcher.is_watching:
+                    await watcher.wait(self.max_delay)
+                else:
+                    await asyncio.sleep(self.max_delay)
 
 
 def find_auth_key(args: Iterable[str]) -> str:
@@ -16,16 +198,28 @@ def find_port(args: Iterable[str]) -> str:
             return arg.split('=')[1]
 
 
-def return_process(process_name: list[str]) -> psutil.Process | None:
-    for process in psutil.process_iter():
-        if process.name() in process_name:
-            return process
-    return None
+async def is_port_open(port: str) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', int(port)), constants.LCU_REQUEST_TIMEOUT)
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
 
+def read_lockfile(path: str) -> LcuCredentials | None:
+    try:
+        with open(path, encoding='utf-8') as file:
+            _, pid, port, auth_key, _ = file.read().strip().split(':')
+        return LcuCredentials(port, auth_key, int(pid), path)
+    except (OSError, ValueError):
+        return None
 
-async def return_ux_process_when_available() -> psutil.Process:
-    process = None
-    while not process:
-        process = return_process(['LeagueClientUx.exe', 'LeagueClientUx'])
-        await asyncio.sleep(0.5)
-    return process
+
+def return_process(process_name: Iterable[str]) -> 'psutil.Process | None':
+    import psutil
+
+    for process in psutil.process_iter(['name']):
+        if process.info['name'] in process_name:
+            return process
+    return None
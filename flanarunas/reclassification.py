@@ -0,0 +1,87 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import jellyfish
+
+import constants
+from champion_registry import ChampionRegistry
+from models.champion import Champion
+from models.page_match import PageMatch
+from models.score_match import ScoreMatch
+from search import normalize_name
+from storage import Storage
+
+
+@dataclass
+class ReclassificationResult:
+    rematched: int = 0
+    # (champion id, name, new champion id) of the pages to move
+    moves: list[tuple[int, str, int]] = field(default_factory=list)
+    page_matches: dict[str, PageMatch] = field(default_factory=dict)
+
+
+class _AddedNames:
+    def __init__(self, champions: Iterable[Champion]):
+        self.names = [normalize_name(champion.name) for champion in champions]
+        self._scores: dict[str, float] = {}
+
+    def best_score(self, word: str) -> float:
+        try:
+            return self._scores[word]
+        except KeyError:
+            normalized_word = normalize_name(word)
+            score = self._scores[word] = max((jellyfish.jaro_winkler_similarity(normalized_word, name) for name in self.names), default=0)
+            return score
+
+    def can_change(self, name: str, page_match: PageMatch) -> bool:
+        # the words before the matched one matched no champion and the matched one scored page_match.score, so only a new
+        # name that beats them can change the champion of the page
+        for i, word in enumerate(name.split()):
+            if i == page_match.word_index:
+                return self.best_score(word) >= page_match.score
+            if self.best_score(word) >= constants.MIN_SCORE:
+                return True
+        return False
+
+
+def reclassify_rune_pages(storage: Storage, old_champions: ChampionRegistry, new_champions: ChampionRegistry) -> ReclassificationResult:
+    # finds the pages whose names match a different champion with new_champions in the stored pages, without changing
+    # them. The moves are applied by the library, to the pages that may have changed since they were read
+    result = ReclassificationResult()
+    old_keys = {(champion.id, champion.name) for champion in old_champions}
+    new_keys = {(champion.id, champion.name) for champion in new_champions}
+    # the pages of a renamed or removed champion are rematched, and the other ones only if an added or renamed champion
+    # can beat their match
+    stale_ids = {champion_id for champion_id, _ in old_keys - new_keys}
+    added_names = _AddedNames(champion for champion in new_champions if (champion.id, champion.name) not in old_keys)
+    if not stale_ids and not added_names.names:
+        return result
+
+    with storage.lock:
+        page_names = storage.load_page_names()
+        page_matches = storage.load_page_matches()
+    old_scored_words: dict[str, ScoreMatch] = {}
+    new_scored_words: dict[str, ScoreMatch] = {}
+    rematched: dict[str, tuple[PageMatch, PageMatch]] = {}
+    for name in {name for _, _, name in page_names}:
+        # the names saved since the last classification are matched with the list they were saved with
+        if (page_match := page_matches.get(name)) is None:
+            page_match = result.page_matches[name] = old_champions.match_details(name, old_scored_words)
+        if page_match.champion_id in stale_ids or added_names.can_change(name, page_match):
+            new_page_match = result.page_matches[name] = new_champions.match_details(name, new_scored_words)
+            rematched[name] = (page_match, new_page_match)
+    result.rematched = len(rematched)
+
+    for champion_id, _, name in page_names:
+        try:
+            page_match, new_page_match = rematched[name]
+        except KeyError:
+            continue
+        # a page is only moved if it is where its old match put it, the ones placed by hand or imported with their
+        # champion stay where they are
+        old_champion_id = page_match.champion_id or constants.UNASSIGNED_CHAMPION_ID
+        new_champion_id = new_page_match.champion_id or constants.UNASSIGNED_CHAMPION_ID
+        if champion_id == old_champion_id and champion_id != new_champion_id:
+            result.moves.append((champion_id, name, new_champion_id))
+
+    return result
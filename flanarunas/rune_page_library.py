@@ -0,0 +1,161 @@
+import asyncio
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+
+import constants
+from metrics import Metrics, NULL_METRICS
+from models.page_match import PageMatch
+from models.rune_page import RunePage
+from rune_page_names import RunePageNames
+from storage import Storage
+from storage_writer import StorageWriter
+
+
+class RunePageLibrary:
+    def __init__(self, storage: Storage, storage_writer: StorageWriter, cache_size=constants.RUNE_PAGE_CACHE_SIZE, metrics: Metrics = NULL_METRICS):
+        self.storage = storage
+        self.storage_writer = storage_writer
+        self.cache_size = cache_size
+        self.metrics = metrics
+        # only the champion ids and their page counts are read at startup, the pages of a champion are decoded the
+        # first time they are needed and kept in a lru cache
+        self.page_counts: dict[int, int] = storage.load_champion_index()
+        self._cached_rune_pages: OrderedDict[int, list[RunePage]] = OrderedDict()
+        self.hit_count = 0
+        self.miss_count = 0
+        self._write_counts: Counter[int] = Counter()
+
+    def __contains__(self, champion_id: int) -> bool:
+        return champion_id in self.page_counts
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.page_counts)
+
+    def __len__(self) -> int:
+        return len(self.page_counts)
+
+    def _cache(self, champion_id: int, rune_pages: list[RunePage]):
+        self._cached_rune_pages[champion_id] = rune_pages
+        self._cached_rune_pages.move_to_end(champion_id)
+        while len(self._cached_rune_pages) > self.cache_size:
+            self._cached_rune_pages.popitem(last=False)
+
+    def _load(self, champion_id: int) -> list[RunePage]:
+        # the writes the writer hasn't applied yet (of an evicted champion) are put on top of the stored pages instead
+        # of waiting for them. The writer only drops them once they are written, so at worst one is applied twice
+        pending = self.storage_writer.get_pending_rune_pages(champion_id)
+        if pending and pending.rune_pages is not None:
+            rune_pages = [rune_page.deep_copy() for rune_page in pending.rune_pages]
+        else:
+            with self.metrics.time('rune_page_library_load_seconds'):
+                rune_pages = self.storage.load_champion_rune_pages(champion_id)
+        if not pending:
+            return rune_pages
+
+        positions = {rune_page.name: i for i, rune_page in enumerate(rune_pages)}
+        for name, rune_page in pending.saved_rune_pages.items():
+            if (i := positions.get(name)) is None:
+                positions[name] = len(rune_pages)
+                rune_pages.append(rune_page.deep_copy())
+            else:
+                rune_pages[i] = rune_page.deep_copy()
+        return rune_pages
+
+    def delete_champion_rune_pages(self, champion_id: int):
+        self._write_counts[champion_id] += 1
+        self.page_counts.pop(champion_id, None)
+        self._cached_rune_pages.pop(champion_id, None)
+        self.storage_writer.delete_champion_rune_pages(champion_id)
+
+    def get(self, champion_id: int) -> list[RunePage]:
+        try:
+            rune_pages = self._cached_rune_pages[champion_id]
+        except KeyError:
+            if champion_id not in self.page_counts:
+                # not cached, so a champion without pages doesn't evict one with them
+                return []
+            self.miss_count += 1
+            self.metrics.increment('rune_page_library', 'miss')
+            rune_pages = self._load(champion_id)
+        else:
+            self.hit_count += 1
+            self.metrics.increment('rune_page_library', 'hit')
+
+        self._cache(champion_id, rune_pages)
+        return rune_pages
+
+    def move_rune_pages(self, moves: Iterable[tuple[int, str, int]], page_matches: dict[str, PageMatch]) -> set[int]:
+        # the (champion_id, name, new_champion_id) moves were found in the stored pages, so they are applied to the
+        # current ones (skipping the pages deleted or renamed since then) and written with the new matches in one batch
+        # after the queued writes
+        new_rune_pages: dict[int, list[RunePage]] = {}
+        new_names: dict[int, RunePageNames] = {}
+        champion_ids = set()
+        for champion_id, name, new_champion_id in moves:
+            for moved_champion_id in (champion_id, new_champion_id):
+                if moved_champion_id not in new_rune_pages:
+                    new_rune_pages[moved_champion_id] = list(self.get(moved_champion_id))
+            rune_pages = new_rune_pages[champion_id]
+            try:
+                i = next(i for i, rune_page in enumerate(rune_pages) if rune_page.name == name)
+            except StopIteration:
+                continue
+
+            if (names := new_names.get(new_champion_id)) is None:
+                names = new_names[new_champion_id] = RunePageNames(rune_page.name for rune_page in new_rune_pages[new_champion_id])
+            rune_page = rune_pages.pop(i).deep_copy()
+            rune_page.name = names.get_free_name(name)
+            names.add(rune_page.name)
+            new_rune_pages[new_champion_id].append(rune_page)
+            champion_ids.update((champion_id, new_champion_id))
+
+        moved_rune_pages = {champion_id: new_rune_pages[champion_id] for champion_id in champion_ids}
+        for champion_id, rune_pages in moved_rune_pages.items():
+            self._write_counts[champion_id] += 1
+            if rune_pages:
+                self._cache(champion_id, rune_pages)
+                self.page_counts[champion_id] = len(rune_pages)
+            else:
+                self.page_counts.pop(champion_id, None)
+                self._cached_rune_pages.pop(champion_id, None)
+        self.storage_writer.move_rune_pages(moved_rune_pages, page_matches)
+        return champion_ids
+
+    @property
+    def page_count(self) -> int:
+        return sum(self.page_counts.values())
+
+    async def prefetch(self, champion_ids: Iterable[int]):
+        # the pages are loaded in a thread to have them cached without blocking the loop, the ones of a champion written
+        # in the meantime are dropped because they may be older than the cached ones
+        for champion_id in champion_ids:
+            if champion_id in self._cached_rune_pages or champion_id not in self.page_counts:
+                continue
+
+            write_count = self._write_counts[champion_id]
+            rune_pages = await asyncio.to_thread(self._load, champion_id)
+            if write_count == self._write_counts[champion_id] and champion_id not in self._cached_rune_pages:
+                self._cache(champion_id, rune_pages)
+
+    def save_rune_page(self, champion_id: int, rune_pages: list[RunePage], rune_page: RunePage):
+        # the page has already been put in rune_pages, the list returned by get, which isn't cached yet if it was empty
+        self._write_counts[champion_id] += 1
+        self._cache(champion_id, rune_pages)
+        self.page_counts[champion_id] = len(rune_pages)
+        self.storage_writer.save_rune_page(champion_id, rune_page)
+
+    def set_champion_rune_pages(self, champion_id: int, rune_pages: Iterable[RunePage]):
+        rune_pages = rune_pages if isinstance(rune_pages, list) else list(rune_pages)
+        self._write_counts[champion_id] += 1
+        self._cache(champion_id, rune_pages)
+        self.page_counts[champion_id] = len(rune_pages)
+        self.storage_writer.set_champion_rune_pages(champion_id, rune_pages)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'champions': len(self.page_counts),
+            'cached_champions': len(self._cached_rune_pages),
+            'hits': self.hit_count,
+            'misses': self.miss_count
+        }
@@ -0,0 +1,44 @@
+import re
+from collections.abc import Iterable
+
+from models.rune_page import RunePage
+
+SUFFIX_PATTERN = re.compile(r'(_\d+)+')
+
+
+def get_suffix_number(text: str) -> int:
+    try:
+        return int(SUFFIX_PATTERN.findall(text)[0].strip('_'))
+    except IndexError:
+        return 0
+
+
+class RunePageNames:
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: set[str] = set()
+        self.next_suffix_number = 1
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def add(self, name: str):
+        self.names.add(name)
+        self.next_suffix_number = max(self.next_suffix_number, get_suffix_number(name) + 1)
+
+    def auto_rename(self, rune_page: RunePage) -> bool:
+        if rune_page.name not in self.names:
+            return False
+
+        rune_page.name = self.get_free_name(rune_page.name)
+        return True
+
+    def get_free_name(self, name: str) -> str:
+        # a taken name gets the next suffix of all the names instead of its own one, so it never takes a used name
+        if name not in self.names:
+            return name
+
+        if get_suffix_number(name):
+            name = SUFFIX_PATTERN.sub('', name)
+        return f'{name}_{self.next_suffix_number}'
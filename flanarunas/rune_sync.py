@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+import aiohttp
+
+import constants
+from lcu_client import LcuClient
+from models.rune_page import RunePage, content_hash
+
+
+@dataclass
+class SyncResult:
+    kept: int = 0
+    updated: int = 0
+    created: int = 0
+    deleted: int = 0
+    is_cancelled: bool = False
+    saved_seconds: float = 0
+
+
+@dataclass
+class PreparedState:
+    client_pages: list[dict]
+    page_limit: int | None
+    fetch_seconds: float
+    prepared_at: float
+
+
+def page_key(page: RunePage | dict) -> tuple[str, int]:
+    if isinstance(page, RunePage):
+        return page.name, page.content_hash
+    return page['name'], content_hash(page['primaryStyleId'], page['subStyleId'], page['selectedPerkIds'])
+
+
+class RunePageSync:
+    def __init__(self, lcu_client: LcuClient, max_state_age=constants.PREPARED_STATE_MAX_AGE):
+        self.lcu_client = lcu_client
+        self.max_state_age = max_state_age
+        self.prepared_state: PreparedState | None = None
+        self._generation = 0
+
+    def _get_prepared_state(self) -> PreparedState | None:
+        if self.prepared_state and time.monotonic() - self.prepared_state.prepared_at > self.max_state_age:
+            self.prepared_state = None
+        return self.prepared_state
+
+    async def get_client_state(self) -> tuple[list[dict] | None, int | None]:
+        try:
+            client_pages, inventory = await asyncio.gather(self.lcu_client.get_pages(), self.lcu_client.get_inventory())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # unknown, the same as an unreadable response, the writes of the sync fail too if the connection is gone
+            return None, None
+
+        return [client_page for client_page in client_pages if client_page.get('isDeletable')], inventory.get('ownedPageCount')
+
+    def invalidate(self):
+        # the pages of the client changed, a prepared state or one being fetched is not valid anymore
+        self._generation += 1
+        self.prepared_state = None
+
+    @property
+    def is_prepared(self) -> bool:
+        return self._get_prepared_state() is not None
+
+    async def prepare(self) -> bool:
+        # fetches the client state before the champion is selected, so the sync only has to send the writes, and leaves
+        # warm connections in the pool for them
+        if self.is_prepared:
+            return False
+
+        generation = self._generation
+        start = time.perf_counter()
+        client_pages, page_limit = await self.get_client_state()
+        if client_pages is None or generation != self._generation:
+            return False
+
+        self.prepared_state = PreparedState(client_pages, page_limit, time.perf_counter() - start, time.monotonic())
+        return True
+
+    async def sync(self, rune_pages: Iterable[RunePage], is_current: Callable[[], bool] = lambda: True) -> SyncResult:
+        rune_pages = list(rune_pages)
+        result = SyncResult()
+        if prepared_state := self._get_prepared_state():
+            client_pages, page_limit = prepared_state.client_pages, prepared_state.page_limit
+            result.saved_seconds = prepared_state.fetch_seconds
+        else:
+            client_pages, page_limit = await self.get_client_state()
+        if page_limit is not None:
+            rune_pages = rune_pages[:page_limit]
+
+        if client_pages is None:
+            # the client state is unknown, so fall back to replacing every page
+            self.invalidate()
+            await self.lcu_client.delete_pages()
+            client_pages = []
+
+        unused_client_pages: dict[tuple, list[dict]] = defaultdict(list)
+        for client_page in client_pages:
+            unused_client_pages[page_key(client_page)].append(client_page)
+
+        pending_pages = []
+        for rune_page in rune_pages:
+            if same_client_pages := unused_client_pages.get(page_key(rune_page)):
+                same_client_pages.pop(0)
+                result.kept += 1
+            else:
+                pending_pages.append(rune_page)
+
+        # pages that are not wanted anymore are rewritten in place instead of deleted and created again
+        reusable_client_pages = [client_page for same_client_pages in unused_client_pages.values() for client_page in same_client_pages]
+        updates = [
+            (client_page['id'], rune_page)
+            for client_page, rune_page in zip(reusable_client_pages, pending_pages)
+        ]
+        deletions = [client_page['id'] for client_page in reusable_client_pages[len(updates):]]
+        creations = pending_pages[len(updates):]
+
+        if not is_current():
+            result.is_cancelled = True
+            return result
+
+        # the states fetched while the pages are being written are dropped too
+        self.invalidate()
+        try:
+            if deletions and not updates and not result.kept:
+                await self.lcu_client.delete_pages()
+            else:
+                await asyncio.gather(
+                    *(self.lcu_client.update_page(page_id, rune_page) for page_id, rune_page in updates),
+                    *(self.lcu_client.delete_page(page_id) for page_id in deletions)
+                )
+            result.updated = len(updates)
+            result.deleted = len(deletions)
+
+            # one at a time, so the pages land in the client in the saved order
+            for rune_page in creations:
+                if not is_current():
+                    result.is_cancelled = True
+                    return result
+                await self.lcu_client.create_page(rune_page)
+                result.created += 1
+        finally:
+            self.invalidate()
+
+        return result
@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import constants
+
+
+class LatestWinsScheduler:
+    def __init__(self, debounce=constants.SYNC_DEBOUNCE):
+        self.debounce = debounce
+        self.tasks: set[asyncio.Task] = set()
+        self._current_task: asyncio.Task | None = None
+        self._started_tasks: set[asyncio.Task] = set()
+        self.scheduled_count = 0
+        self.started_count = 0
+        self.coalesced_count = 0
+        self.cancelled_count = 0
+
+    def _on_task_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self._started_tasks.discard(task)
+        if task is self._current_task:
+            self._current_task = None
+        if not task.cancelled() and (exception := task.exception()):
+            asyncio.get_running_loop().call_exception_handler({'message': 'Scheduled task failed', 'exception': exception, 'task': task})
+
+    async def _run(self, coroutine_function: Callable[[], Awaitable[Any]], debounce: float) -> Any:
+        if debounce:
+            await asyncio.sleep(debounce)
+        self._started_tasks.add(asyncio.current_task())
+        self.started_count += 1
+        return await coroutine_function()
+
+    async def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def schedule(self, coroutine_function: Callable[[], Awaitable[Any]], debounce: float = None) -> asyncio.Task:
+        self.scheduled_count += 1
+        if self._current_task and not self._current_task.done():
+            if self._current_task in self._started_tasks:
+                self.cancelled_count += 1
+            else:
+                self.coalesced_count += 1
+            self._current_task.cancel()
+
+        self._current_task = asyncio.create_task(self._run(coroutine_function, self.debounce if debounce is None else debounce))
+        self.tasks.add(self._current_task)
+        self._current_task.add_done_callback(self._on_task_done)
+        return self._current_task
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'scheduled': self.scheduled_count,
+            'started': self.started_count,
+            'coalesced': self.coalesced_count,
+            'cancelled': self.cancelled_count,
+            'pending': len(self.tasks)
+        }
@@ -0,0 +1,172 @@
+import bisect
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+
+import jellyfish
+
+import constants
+from string_utils import remove_accents
+
+WINKLER_PREFIX_LENGTH = 4
+WINKLER_PREFIX_WEIGHT = 0.1
+SCORE_EPSILON = 1e-9
+SEPARATOR = '\n'
+
+
+def normalize_name(text: str) -> str:
+    return remove_accents(text.lower())
+
+
+class CharIndex:
+    def __init__(self, words: Iterable[str]):
+        self.words = list(words)
+        self._index: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for i, word in enumerate(self.words):
+            for char, count in Counter(word).items():
+                self._index[char].append((i, count))
+
+    def add(self, word: str) -> int:
+        self.words.append(word)
+        for char, count in Counter(word).items():
+            self._index[char].append((len(self.words) - 1, count))
+        return len(self.words) - 1
+
+    def candidates(self, word: str, min_score=constants.MIN_SCORE) -> list[int]:
+        # the jaro matching characters can never exceed the characters both strings have in common, so that count gives
+        # an upper bound of the jaro-winkler similarity that discards most words without computing it
+        common_chars: dict[int, int] = defaultdict(int)
+        for char, word_count in Counter(word).items():
+            for i, indexed_count in self._index.get(char, ()):
+                common_chars[i] += min(word_count, indexed_count)
+
+        candidates = []
+        for i, common in common_chars.items():
+            indexed_word = self.words[i]
+            max_jaro = (common / len(word) + common / len(indexed_word) + 1) / 3
+            prefix_length = 0
+            for word_char, indexed_char in zip(word[:WINKLER_PREFIX_LENGTH], indexed_word[:WINKLER_PREFIX_LENGTH]):
+                if word_char != indexed_char:
+                    break
+                prefix_length += 1
+            max_score = max_jaro + prefix_length * WINKLER_PREFIX_WEIGHT * (1 - max_jaro)
+            if max_score >= min_score - SCORE_EPSILON:
+                candidates.append(i)
+
+        candidates.sort()
+        return candidates
+
+
+class SearchIndex:
+    def __init__(self, items: Iterable[str] = ()):
+        self._items = sorted(items)
+        # the keys sorted with their items for the prefix ranges, updated in place on every change
+        self._sorted_keys: list[str] = []
+        self._sorted_items: list[str] = []
+        for key, item in sorted((normalize_name(item), item) for item in self._items):
+            self._sorted_keys.append(key)
+            self._sorted_items.append(item)
+        self._joined_keys: str | None = None
+        self._word_items: dict[str, list[str]] = defaultdict(list)
+        for key, item in zip(self._sorted_keys, self._sorted_items):
+            for word in set(key.split()):
+                self._word_items[word].append(item)
+        self._word_index: CharIndex | None = None
+
+    def __contains__(self, item: str) -> bool:
+        return self.index(item) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _fuzzy_search(self, normalized_text: str) -> list[str]:
+        if self._word_index is None:
+            self._word_index = CharIndex(self._word_items)
+
+        scores: dict[str, float] = {}
+        for word_index in self._word_index.candidates(normalized_text):
+            word = self._word_index.words[word_index]
+            if (score := jellyfish.jaro_winkler_similarity(normalized_text, word)) >= constants.MIN_SCORE:
+                for item in self._word_items.get(word, ()):
+                    scores[item] = max(score, scores.get(item, 0))
+
+        return sorted(scores, key=lambda item: (-scores[item], item))
+
+    def _sorted_row(self, key: str, item: str) -> int:
+        row = bisect.bisect_left(self._sorted_keys, key)
+        end = bisect.bisect_right(self._sorted_keys, key, row)
+        return bisect.bisect_left(self._sorted_items, item, row, end)
+
+    def add(self, item: str) -> int:
+        row = bisect.bisect_left(self._items, item)
+        self._items.insert(row, item)
+        key = normalize_name(item)
+        sorted_row = self._sorted_row(key, item)
+        self._sorted_keys.insert(sorted_row, key)
+        self._sorted_items.insert(sorted_row, item)
+        self._joined_keys = None
+        for word in set(key.split()):
+            if word not in self._word_items and self._word_index is not None:
+                self._word_index.add(word)
+            self._word_items[word].append(item)
+        return row
+
+    def index(self, item: str) -> int | None:
+        row = bisect.bisect_left(self._items, item)
+        if row < len(self._items) and self._items[row] == item:
+            return row
+
+    @property
+    def items(self) -> list[str]:
+        return self._items
+
+    def remove(self, item: str) -> int | None:
+        if (row := self.index(item)) is None:
+            return
+
+        del self._items[row]
+        key = normalize_name(item)
+        sorted_row = self._sorted_row(key, item)
+        del self._sorted_keys[sorted_row]
+        del self._sorted_items[sorted_row]
+        self._joined_keys = None
+        for word in set(key.split()):
+            # the word stays in the character index, without items it matches nothing
+            self._word_items[word].remove(item)
+        return row
+
+    def search(self, text: str, limit: int = None) -> list[str]:
+        if not (normalized_text := normalize_name(text.strip())):
+            return self._items[:limit]
+
+        # the keys that start with the text are a contiguous range of the sorted keys and go first
+        start = bisect.bisect_left(self._sorted_keys, normalized_text)
+        end = start
+        while end < len(self._sorted_keys) and self._sorted_keys[end].startswith(normalized_text) and end - start != limit:
+            end += 1
+        matches = self._sorted_items[start:end]
+
+        # every key in one string in the sorted order, so a substring search is a few str.find calls in C instead of a
+        # loop over every key, and the key around a match is found again with bisect. Joining the sorted keys is the
+        # only work left after a change
+        if self._joined_keys is None:
+            self._joined_keys = SEPARATOR.join(self._sorted_keys)
+        joined_keys = self._joined_keys
+        position = joined_keys.find(normalized_text)
+        while position != -1 and len(matches) != limit:
+            key_start = joined_keys.rfind(SEPARATOR, 0, position) + len(SEPARATOR)
+            if (key_end := joined_keys.find(SEPARATOR, position)) == -1:
+                key_end = len(joined_keys)
+            key = joined_keys[key_start:key_end]
+            row = bisect.bisect_left(self._sorted_keys, key)
+            row_end = bisect.bisect_right(self._sorted_keys, key, row)
+            if position != key_start:
+                matches.extend(self._sorted_items[row:row_end if limit is None else min(row_end, row + limit - len(matches))])
+            # the same keys are next to each other in the joined string
+            position = joined_keys.find(normalized_text, key_end + (row_end - row - 1) * (len(key) + len(SEPARATOR)))
+
+        if matches:
+            return matches
+        return self._fuzzy_search(normalized_text)[:limit]
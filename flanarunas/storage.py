@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+import constants
+from file_utils import write_atomically
+from models.page_match import PageMatch
+from models.rune_page import RunePage, content_hash
+
+SCHEMA_VERSION = 4
+
+
+class Storage:
+    def __init__(self, database_path=constants.DATABASE_PATH, config_path=constants.CONFIG_PATH, legacy_data_path=constants.LEGACY_DATA_PATH):
+        self.database_path = database_path
+        self.config_path = config_path
+        self.legacy_data_path = legacy_data_path
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(database_path, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute(f'PRAGMA mmap_size = {constants.DATABASE_MMAP_SIZE}')
+        self._migrate()
+
+    @staticmethod
+    def _rune_page_from_row(row: Iterable) -> RunePage:
+        is_active, name, order, primary_style_id, sub_style_id, selected_perk_ids = row
+        return RunePage(bool(is_active), name, order, primary_style_id, sub_style_id, json.loads(selected_perk_ids))
+
+    @staticmethod
+    def _rune_page_row(rune_page: RunePage) -> tuple:
+        return rune_page.name, rune_page.isActive, rune_page.order, rune_page.content_hash
+
+    def _delete_unused_bodies(self):
+        # one pass when closing instead of an index of the hashes of the pages that every write would have to update
+        self.connection.execute('DELETE FROM page_bodies WHERE content_hash NOT IN (SELECT content_hash FROM rune_pages)')
+
+    def _import_legacy_data(self):
+        try:
+            with open(self.legacy_data_path, encoding='utf-8') as file:
+                raw_dict = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if 'config' in raw_dict and not os.path.exists(self.config_path):
+            self.save_config(raw_dict['config'])
+
+        for champion_id, rune_pages in raw_dict.get('rune_pages', {}).items():
+            self._insert_rune_pages(int(champion_id), (RunePage.from_json(rune_page_json) for rune_page_json in rune_pages))
+
+    def _insert_bodies(self, bodies: dict[int, RunePage]):
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO page_bodies (content_hash, primary_style_id, sub_style_id, selected_perk_ids) VALUES (?, ?, ?, ?)',
+            ((content_hash_, rune_page.primaryStyleId, rune_page.subStyleId, json.dumps(rune_page.selectedPerkIds)) for content_hash_, rune_page in bodies.items())
+        )
+
+    def _insert_rows(self, champion_id: int, rune_pages: list[RunePage], rows: list[tuple], start_position=0, stored_hashes: set[int] = frozenset()):
+        # the (name, is_active, page_order, content_hash) rows of the pages, so every hash is computed once, and the
+        # bodies of stored_hashes are already in the database
+        self._insert_bodies({row[3]: rune_page for rune_page, row in zip(rune_pages, rows) if row[3] not in stored_hashes})
+        self.connection.executemany(
+            'INSERT INTO rune_pages (champion_id, position, name, is_active, page_order, content_hash) VALUES (?, ?, ?, ?, ?, ?)',
+            ((champion_id, position, *row) for position, row in enumerate(rows, start_position))
+        )
+
+    def _insert_rune_pages(self, champion_id: int, rune_pages: Iterable[RunePage], start_position=0):
+        rune_pages = rune_pages if isinstance(rune_pages, list) else list(rune_pages)
+        self._insert_rows(champion_id, rune_pages, [self._rune_page_row(rune_page) for rune_page in rune_pages], start_position)
+
+    def _migrate(self):
+        if (version := self.connection.execute('PRAGMA user_version').fetchone()[0]) >= SCHEMA_VERSION:
+            return
+
+        with self.connection:
+            self.connection.execute('BEGIN')
+            if version < 1:
+                self.connection.execute('''
+                    CREATE TABLE rune_pages (
+                        champion_id INTEGER NOT NULL,
+                        position INTEGER NOT NULL,
+                        name TEXT NOT NULL,
+                        is_active INTEGER NOT NULL,
+                        page_order INTEGER,
+                        primary_style_id INTEGER,
+                        sub_style_id INTEGER,
+                        selected_perk_ids TEXT NOT NULL,
+                        PRIMARY KEY (champion_id, position)
+                    )
+                ''')
+                self.connection.execute('CREATE INDEX rune_pages_name ON rune_pages (champion_id, name)')
+            if version < 2:
+                # the champions with saved pages and their page counts, so the startup reads one row per champion instead
+                # of every page
+                self.connection.execute('CREATE TABLE champions (champion_id INTEGER PRIMARY KEY, page_count INTEGER NOT NULL)')
+                self.connection.execute('INSERT INTO champions SELECT champion_id, COUNT(*) FROM rune_pages GROUP BY champion_id')
+            if version < 3:
+                # how every page name matched the champion list it was last classified with, so a new list only
+                # rematches the names it can change
+                self.connection.execute('''
+                    CREATE TABLE page_matches (
+                        name TEXT PRIMARY KEY,
+                        champion_id INTEGER,
+                        word_index INTEGER NOT NULL,
+                        score REAL NOT NULL
+                    )
+                ''')
+            if version < 4:
+                # the runes are stored once per distinct content and the pages refer to them by its hash
+                self.connection.create_function(
+                    'content_hash',
+                    3,
+                    lambda primary_style_id, sub_style_id, selected_perk_ids: content_hash(primary_style_id, sub_style_id, json.loads(selected_perk_ids)),
+                    deterministic=True
+                )
+                self.connection.execute('''
+                    CREATE TABLE page_bodies (
+                        content_hash INTEGER PRIMARY KEY,
+                        primary_style_id INTEGER,
+                        sub_style_id INTEGER,
+                        selected_perk_ids TEXT NOT NULL
+                    )
+                ''')
+                self.connection.execute('''
+                    INSERT OR IGNORE INTO page_bodies
+                    SELECT content_hash(primary_style_id, sub_style_id, selected_perk_ids), primary_style_id, sub_style_id, selected_perk_ids
+                    FROM rune_pages
+                ''')
+                self.connection.execute('''
+                    CREATE TABLE new_rune_pages (
+                        champion_id INTEGER NOT NULL,
+                        position INTEGER NOT NULL,
+                        name TEXT NOT NULL,
+                        is_active INTEGER NOT NULL,
+                        page_order INTEGER,
+                        content_hash INTEGER NOT NULL,
+                        PRIMARY KEY (champion_id, position)
+                    )
+                ''')
+                self.connection.execute('''
+                    INSERT INTO new_rune_pages
+                    SELECT champion_id, position, name, is_active, page_order, content_hash(primary_style_id, sub_style_id, selected_perk_ids)
+                    FROM rune_pages
+                ''')
+                self.connection.execute('DROP TABLE rune_pages')
+                self.connection.execute('ALTER TABLE new_rune_pages RENAME TO rune_pages')
+                self.connection.execute('CREATE INDEX rune_pages_name ON rune_pages (champion_id, name)')
+            if version < 1:
+                # the legacy data is imported once the tables have their last schema
+                self._import_legacy_data()
+                self.connection.execute('INSERT INTO champions SELECT champion_id, COUNT(*) FROM rune_pages GROUP BY champion_id')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _save_page_matches(self, page_matches: dict[str, PageMatch]):
+        # the matches of the names that are no longer used by any page are dropped with them
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO page_matches (name, champion_id, word_index, score) VALUES (?, ?, ?, ?)',
+            ((name, page_match.champion_id, page_match.word_index, page_match.score) for name, page_match in page_matches.items())
+        )
+        self.connection.execute('DELETE FROM page_matches WHERE name NOT IN (SELECT name FROM rune_pages)')
+
+    def _set_champion_rune_pages(self, champion_id: int, rune_pages: Iterable[RunePage]):
+        # an empty snapshot leaves the champion without pages, like a deletion
+        rune_pages = rune_pages if isinstance(rune_pages, list) else list(rune_pages)
+        rows = [self._rune_page_row(rune_page) for rune_page in rune_pages]
+        old_rows = self.connection.execute('SELECT name, is_active, page_order, content_hash FROM rune_pages WHERE champion_id = ? ORDER BY position', (champion_id,)).fetchall()
+        # a snapshot of unchanged pages is not written
+        if old_rows == rows:
+            return
+
+        self.connection.execute('DELETE FROM rune_pages WHERE champion_id = ?', (champion_id,))
+        self.connection.execute('DELETE FROM champions WHERE champion_id = ?', (champion_id,))
+        old_hashes = {row[3] for row in old_rows}
+        self._insert_rows(champion_id, rune_pages, rows, stored_hashes=old_hashes)
+        self.connection.execute('INSERT INTO champions SELECT champion_id, COUNT(*) FROM rune_pages WHERE champion_id = ? GROUP BY champion_id', (champion_id,))
+
+    def append_rune_pages(self, rune_pages: dict[int, list[RunePage]]):
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            for champion_id, champion_rune_pages in rune_pages.items():
+                start_position = self.connection.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM rune_pages WHERE champion_id = ?', (champion_id,)).fetchone()[0]
+                self._insert_rune_pages(champion_id, champion_rune_pages, start_position)
+                self.connection.execute('''
+                    INSERT INTO champions (champion_id, page_count) VALUES (?, ?)
+                    ON CONFLICT (champion_id) DO UPDATE SET page_count = page_count + excluded.page_count
+                ''', (champion_id, len(champion_rune_pages)))
+
+    def close(self):
+        with self.lock:
+            self._delete_unused_bodies()
+            self.connection.close()
+
+    def delete_champion_rune_pages(self, champion_id: int):
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.execute('DELETE FROM rune_pages WHERE champion_id = ?', (champion_id,))
+            self.connection.execute('DELETE FROM champions WHERE champion_id = ?', (champion_id,))
+
+    def load_champion_index(self) -> dict[int, int]:
+        with self.lock:
+            return dict(self.connection.execute('SELECT champion_id, page_count FROM champions'))
+
+    def load_champion_rune_pages(self, champion_id: int) -> list[RunePage]:
+        with self.lock:
+            return [
+                self._rune_page_from_row(row) for row in self.connection.execute('''
+                    SELECT is_active, name, page_order, primary_style_id, sub_style_id, selected_perk_ids
+                    FROM rune_pages JOIN page_bodies USING (content_hash)
+                    WHERE champion_id = ?
+                    ORDER BY position
+                ''', (champion_id,))
+            ]
+
+    def load_config(self) -> dict[str, Any]:
+        try:
+            with open(self.config_path, encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load_page_matches(self) -> dict[str, PageMatch]:
+        with self.lock:
+            return {name: PageMatch(*row) for name, *row in self.connection.execute('SELECT name, champion_id, word_index, score FROM page_matches')}
+
+    def load_page_names(self) -> list[tuple[int, int, str]]:
+        with self.lock:
+            return self.connection.execute('SELECT champion_id, position, name FROM rune_pages').fetchall()
+
+    def load_rune_pages(self) -> dict[int, list[RunePage]]:
+        with self.lock:
+            rune_pages: dict[int, list[RunePage]] = {}
+            for champion_id, *row in self.connection.execute('''
+                SELECT champion_id, is_active, name, page_order, primary_style_id, sub_style_id, selected_perk_ids
+                FROM rune_pages JOIN page_bodies USING (content_hash)
+                ORDER BY champion_id, position
+            '''):
+                rune_pages.setdefault(champion_id, []).append(self._rune_page_from_row(row))
+
+            return rune_pages
+
+    def move_rune_pages(self, rune_pages: dict[int, list[RunePage]], page_matches: dict[str, PageMatch]):
+        # the snapshots of the champions the pages are moved from and to, and the matches of their names, in one
+        # transaction so a page is never stored under both champions or neither
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            for champion_id, champion_rune_pages in rune_pages.items():
+                self._set_champion_rune_pages(champion_id, champion_rune_pages)
+            self._save_page_matches(page_matches)
+
+    def save_config(self, config: dict[str, Any]):
+        write_atomically(self.config_path, json.dumps(config))
+
+    def save_page_matches(self, page_matches: dict[str, PageMatch]):
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            self._save_page_matches(page_matches)
+
+    def save_rune_page(self, champion_id: int, rune_page: RunePage):
+        name, is_active, order, content_hash_ = self._rune_page_row(rune_page)
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            old_row = self.connection.execute('SELECT is_active, page_order, content_hash FROM rune_pages WHERE champion_id = ? AND name = ?', (champion_id, name)).fetchone()
+            # an unchanged page is not written, and a known content is not stored again
+            if old_row == (is_active, order, content_hash_):
+                return
+            if not old_row or old_row[2] != content_hash_:
+                self._insert_bodies({content_hash_: rune_page})
+
+            if old_row:
+                self.connection.execute('UPDATE rune_pages SET is_active = ?, page_order = ?, content_hash = ? WHERE champion_id = ? AND name = ?', (is_active, order, content_hash_, champion_id, name))
+            else:
+                self.connection.execute('''
+                    INSERT INTO rune_pages (champion_id, position, name, is_active, page_order, content_hash)
+                    VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM rune_pages WHERE champion_id = ?), ?, ?, ?, ?)
+                ''', (champion_id, champion_id, name, is_active, order, content_hash_))
+                self.connection.execute('''
+                    INSERT INTO champions (champion_id, page_count) VALUES (?, 1)
+                    ON CONFLICT (champion_id) DO UPDATE SET page_count = page_count + 1
+                ''', (champion_id,))
+
+    def set_champion_rune_pages(self, champion_id: int, rune_pages: Iterable[RunePage]):
+        with self.lock, self.connection:
+            self.connection.execute('BEGIN')
+            self._set_champion_rune_pages(champion_id, rune_pages)
@@ -0,0 +1,244 @@
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import constants
+from metrics import Metrics, NULL_METRICS
+from models.page_match import PageMatch
+from models.rune_page import RunePage
+from storage import Storage
+
+Key = tuple[Hashable, ...]
+Operation = Callable[[Storage], Any]
+
+MOVES_KEY = 'moves'
+
+
+@dataclass
+class PendingRunePages:
+    # the writes of a champion not in the database yet: a snapshot that replaces its stored pages ([] if they were
+    # deleted) and the pages saved by name after it
+    rune_pages: list[RunePage] | None = None
+    saved_rune_pages: dict[str, RunePage] = field(default_factory=dict)
+
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _Stop(_Flush):
+    pass
+
+
+class StorageWriter(threading.Thread):
+    def __init__(self, storage: Storage, max_size=constants.WRITER_QUEUE_SIZE, coalesce_delay=constants.WRITER_COALESCE_DELAY, metrics: Metrics = NULL_METRICS):
+        super().__init__(name='StorageWriter', daemon=True)
+        self.storage = storage
+        self.metrics = metrics
+        self.coalesce_delay = coalesce_delay
+        self.queue: queue.Queue[tuple[Key, Operation] | _Flush] = queue.Queue(max_size)
+        self.submitted_count = 0
+        self.coalesced_count = 0
+        self.written_count = 0
+        self.error_count = 0
+        self.backpressure_count = 0
+        self._overflow_lock = threading.Lock()
+        self._overflow: deque[tuple[Key, Operation] | _Flush] = deque()
+        self._pending_lock = threading.Lock()
+        self._pending_rune_pages: dict[int, PendingRunePages] = {}
+        self._unwritten_count = 0
+        self.start()
+
+    def _put(self, item: tuple[Key, Operation] | _Flush):
+        # the writes are submitted from the loop, so a full queue doesn't block it: the writes wait in the overflow, in
+        # order and replacing their pending ones, until the writer makes room
+        with self._overflow_lock:
+            if not self._overflow:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+            self.backpressure_count += 1
+            if not isinstance(item, _Flush) and item[0][0] != MOVES_KEY:
+                key = item[0]
+                for i in range(len(self._overflow) - 1, -1, -1):
+                    overflow_item = self._overflow[i]
+                    # a write is only replaced if nothing written after it could overwrite the new one
+                    if isinstance(overflow_item, _Flush) or overflow_item[0][0] == MOVES_KEY:
+                        break
+                    overflow_key = overflow_item[0]
+                    if overflow_key != key and (overflow_key[:len(key)] == key or key[:len(overflow_key)] == overflow_key):
+                        break
+                    if overflow_key == key:
+                        self._overflow[i] = item
+                        self.coalesced_count += 1
+                        # the replaced write never reaches the writer to be counted as written
+                        with self._pending_lock:
+                            self._unwritten_count -= 1
+                        return
+            self._overflow.append(item)
+
+    def _refill(self):
+        with self._overflow_lock:
+            while self._overflow:
+                try:
+                    self.queue.put_nowait(self._overflow[0])
+                except queue.Full:
+                    return
+                self._overflow.popleft()
+
+    def _submit_rune_pages(self, champion_id: int, key: Key, operation: Operation, update: Callable[[PendingRunePages], Any]):
+        # in one step with the count, so the writer can't drop the update before the operation is queued
+        self.submitted_count += 1
+        with self._pending_lock:
+            update(self._pending_rune_pages.setdefault(champion_id, PendingRunePages()))
+            self._unwritten_count += 1
+        self._put((key, operation))
+
+    def _write(self, pending: dict[Key, Operation], dequeued_count: int):
+        for operation in pending.values():
+            try:
+                with self.metrics.time('storage_write_seconds'):
+                    operation(self.storage)
+            except Exception:
+                self.error_count += 1
+                traceback.print_exc()
+            else:
+                self.written_count += 1
+        pending.clear()
+
+        # the pending pages are only dropped once everything submitted is written, a write submitted while these were
+        # being written keeps them all
+        with self._pending_lock:
+            self._unwritten_count -= dequeued_count
+            if not self._unwritten_count:
+                self._pending_rune_pages.clear()
+
+    def close(self):
+        if not self.is_alive():
+            return
+
+        stop = _Stop()
+        self._put(stop)
+        stop.done.wait()
+        self.join()
+
+    def delete_champion_rune_pages(self, champion_id: int):
+        def update(pending: PendingRunePages):
+            pending.rune_pages = []
+            pending.saved_rune_pages.clear()
+
+        self._submit_rune_pages(champion_id, (champion_id,), lambda storage: storage.delete_champion_rune_pages(champion_id), update)
+
+    def flush(self, timeout: float = None) -> bool:
+        if not self.is_alive():
+            return True
+
+        flush = _Flush()
+        self._put(flush)
+        return flush.done.wait(timeout)
+
+    def get_pending_rune_pages(self, champion_id: int) -> PendingRunePages | None:
+        with self._pending_lock:
+            if not (pending := self._pending_rune_pages.get(champion_id)):
+                return None
+            return PendingRunePages(None if pending.rune_pages is None else list(pending.rune_pages), dict(pending.saved_rune_pages))
+
+    def move_rune_pages(self, rune_pages: dict[int, list[RunePage]], page_matches: dict[str, PageMatch]):
+        # one operation for all the champions, written in one transaction, with its own key so no other write replaces it
+        rune_pages = {champion_id: [rune_page.deep_copy() for rune_page in champion_rune_pages] for champion_id, champion_rune_pages in rune_pages.items()}
+        page_matches = dict(page_matches)
+        self.submitted_count += 1
+        with self._pending_lock:
+            for champion_id, champion_rune_pages in rune_pages.items():
+                pending = self._pending_rune_pages.setdefault(champion_id, PendingRunePages())
+                pending.rune_pages = champion_rune_pages
+                pending.saved_rune_pages.clear()
+            self._unwritten_count += 1
+        self._put(((MOVES_KEY, self.submitted_count), lambda storage: storage.move_rune_pages(rune_pages, page_matches)))
+
+    def run(self):
+        pending: dict[Key, Operation] = {}
+        dequeued_count = 0
+        while True:
+            item = self.queue.get()
+            self._refill()
+            deadline = time.monotonic() + self.coalesce_delay
+            while True:
+                if isinstance(item, _Flush):
+                    self._write(pending, dequeued_count)
+                    dequeued_count = 0
+                    item.done.set()
+                    if isinstance(item, _Stop):
+                        return
+                    break
+
+                key, operation = item
+                # the writes queued before a move are written first, so none of the later ones replaces one of them in
+                # front of it
+                if key[0] == MOVES_KEY and pending:
+                    self._write(pending, dequeued_count)
+                    dequeued_count = 0
+                dequeued_count += 1
+                for pending_key in [pending_key for pending_key in pending if len(pending_key) > len(key) and pending_key[:len(key)] == key]:
+                    del pending[pending_key]
+                    self.coalesced_count += 1
+                if key in pending:
+                    self.coalesced_count += 1
+                pending[key] = operation
+
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    self._refill()
+                except queue.Empty:
+                    self._write(pending, dequeued_count)
+                    dequeued_count = 0
+                    break
+
+    def save_config(self, config: dict[str, Any]):
+        config = dict(config)
+        self.submit(('config',), lambda storage: storage.save_config(config))
+
+    def save_rune_page(self, champion_id: int, rune_page: RunePage):
+        rune_page = rune_page.deep_copy()
+
+        def update(pending: PendingRunePages):
+            # a page saved again keeps its place, like the row it updates
+            pending.saved_rune_pages[rune_page.name] = rune_page
+
+        self._submit_rune_pages(champion_id, (champion_id, rune_page.name), lambda storage: storage.save_rune_page(champion_id, rune_page), update)
+
+    def set_champion_rune_pages(self, champion_id: int, rune_pages: Iterable[RunePage]):
+        rune_pages = [rune_page.deep_copy() for rune_page in rune_pages]
+
+        def update(pending: PendingRunePages):
+            pending.rune_pages = rune_pages
+            pending.saved_rune_pages.clear()
+
+        self._submit_rune_pages(champion_id, (champion_id,), lambda storage: storage.set_champion_rune_pages(champion_id, rune_pages), update)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'submitted': self.submitted_count,
+            'coalesced': self.coalesced_count,
+            'written': self.written_count,
+            'errors': self.error_count,
+            'backpressure': self.backpressure_count,
+            'queued': self.queue.qsize() + len(self._overflow)
+        }
+
+    def submit(self, key: Key, operation: Operation):
+        # a pending operation is replaced in place by a later one with the same key, and dropped by a later one whose
+        # key is a prefix of its key (a champion snapshot already contains the pending saves of its rune pages)
+        self.submitted_count += 1
+        with self._pending_lock:
+            self._unwritten_count += 1
+        self._put((key, operation))
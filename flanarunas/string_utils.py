@@ -0,0 +1,14 @@
+import unicodedata
+from collections.abc import Iterable
+
+
+def remove_accents(text: str, ignore: Iterable[str] = ('ñ', 'ç')) -> str:
+    if text.isascii():
+        return text
+
+    return ''.join(
+        normalized_char
+        for char in text
+        for normalized_char in (char if char in ignore else unicodedata.normalize('NFD', char))
+        if char in ignore or unicodedata.category(normalized_char) != 'Mn'
+    )